@@ -7,20 +7,76 @@ Fish Audio Studio - Streamlit Web UI
 import streamlit as st
 import os
 from pathlib import Path
+import asyncio
+import io
+import wave
 import tempfile
+import shutil
+import hashlib
+import time
+import importlib.util
+import concurrent.futures
+import weakref
+from dataclasses import dataclass
 from datetime import datetime
 import json
+import pandas as pd
 
-# Whisper用のインポート
+# Whisperの有無のみ確認（faster-whisperを優先し、なければopenai-whisperを使用）
+# 読み込みに時間がかかるため、実際のインポートは文字起こし時まで遅らせる
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+OPENAI_WHISPER_AVAILABLE = importlib.util.find_spec("whisper") is not None
+
+WHISPER_AVAILABLE = FASTER_WHISPER_AVAILABLE or OPENAI_WHISPER_AVAILABLE
+
+# models.jsonの読み書き（orjsonがあれば高速なorjsonを使用し、なければ標準のjsonを使用）
 try:
-    import whisper
-    WHISPER_AVAILABLE = True
+    import orjson
+    
+    def _json_loads(b: bytes):
+        return orjson.loads(b)
+    
+    def _json_dumps(data) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
 except ImportError:
-    WHISPER_AVAILABLE = False
+    def _json_loads(b: bytes):
+        return json.loads(b)
+    
+    def _json_dumps(data) -> bytes:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+# 自動文字起こしで選択できるWhisperモデル（短いクローン用サンプルにはtinyで十分な精度）
+WHISPER_MODEL_SIZES = ["tiny", "base", "small"]
+if FASTER_WHISPER_AVAILABLE:
+    # 日本語向けに最適化されたCTranslate2版（精度重視）
+    WHISPER_MODEL_SIZES.append("kotoba-tech/kotoba-whisper-v2.0-faster")
+
+# 生成中の受信量表示を更新する間隔（秒）
+TTS_PREVIEW_INTERVAL = 1.0
+
+# Fish Audioが返すPCMの形式（generate_ttsでsample_rate=44100を指定、16bitモノラル）
+PCM_SAMPLE_RATE = 44100
+
+# 圧縮済みの送信データをセッション内に保持する時間（秒）
+UPLOAD_CACHE_TTL = 600
+
+# 音声形式（拡張子）ごとのMIMEタイプ
+FORMAT_MIME = {
+    "wav": "audio/wav",
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg; codecs=opus",
+    "pcm": "audio/L16",
+    "m4a": "audio/mp4",
+    "ogg": "audio/ogg",
+    "flac": "audio/flac",
+}
 
 # 既存のモジュールをインポート（appフォルダ内のカスタマイズ版を使用）
-from create_voice_clone import create_voice_clone_model, list_existing_models
-from generate_tts import generate_tts, load_model_id_from_file, check_api_credit
+from create_voice_clone import (
+    create_voice_clone_model_async, list_existing_models,
+    compress_to_opus, LOSSLESS_SUFFIXES
+)
+from generate_tts import iter_tts, load_model_id_from_file, check_api_credit, get_session as get_fish_session
 
 # .envファイルがあれば読み込む
 try:
@@ -37,6 +93,53 @@ st.set_page_config(
     layout="wide"
 )
 
+@dataclass
+class TxState:
+    """アップロード中の音声ファイルに対する自動文字起こしの状態"""
+    file_id: str = ""       # 対象のアップロードファイル
+    auto_text: str = ""     # 自動文字起こしの結果
+    applied: bool = False   # 結果を文字起こし欄に適用済みか
+    edited: bool = False    # ユーザーが文字起こしを編集したか
+
+def _remove_file(path: str):
+    """ファイルを削除（既に削除済みの場合は何もしない）"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+@dataclass(eq=False)
+class UploadedTempFile:
+    """アップロードファイルを書き出した一時ファイル
+    
+    セッション状態ごと破棄された場合（タブを閉じたときなど）やプロセス終了時にも
+    一時ファイルが削除されるよう、ファイナライザを登録する。
+    """
+    file_id: str
+    path: str
+    
+    def __post_init__(self):
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+    
+    def remove(self):
+        """一時ファイルを削除"""
+        self._finalizer()
+
+async def run_with_status(coro, status, label: str):
+    """コルーチンの完了を待ちながら、st.statusのラベルに経過時間を表示"""
+    task = asyncio.ensure_future(coro)
+    start = time.monotonic()
+    while not task.done():
+        status.update(label=f"{label}（{time.monotonic() - start:.0f}秒経過）")
+        await asyncio.wait({task}, timeout=1.0)
+    return task.result()
+
+def show_error_details(error: Exception):
+    """例外のトレースバックを折りたたみ表示（エラーが発生した実行でのみ整形する）"""
+    import traceback
+    with st.expander("詳細なエラー情報"):
+        st.code("".join(traceback.format_exception(type(error), error, error.__traceback__)))
+
 def init_session_state():
     """セッション状態の初期化"""
     if "fish_audio_api_key" not in st.session_state:
@@ -50,18 +153,16 @@ def init_session_state():
     
     # モデル辞書: {モデル名: モデルID} のマッピング
     if "models_dict" not in st.session_state:
-        st.session_state.models_dict = {}
         # JSONファイルから読み込む
-        json_data = load_models_from_json()
-        for model_entry in json_data.get("models", []):
-            name = model_entry.get("name", "")
-            model_id = model_entry.get("id", "")
-            if name and model_id:
-                st.session_state.models_dict[name] = model_id
+        st.session_state.models_dict = models_dict_from_json_data(load_models_from_json())
     
     if "show_model_management" not in st.session_state:
         st.session_state.show_model_management = False
     
+    # 詳細を表示しているモデルのID
+    if "detail_visible" not in st.session_state:
+        st.session_state.detail_visible = set()
+    
     if "last_model_id" not in st.session_state:
         json_data = load_models_from_json()
         last_used = json_data.get("last_used", {})
@@ -80,40 +181,141 @@ def init_session_state():
     
     if "tts_format" not in st.session_state:
         st.session_state.tts_format = "wav"
+    
+    if "whisper_model_size" not in st.session_state:
+        st.session_state.whisper_model_size = WHISPER_MODEL_SIZES[0]
+
+MODELS_JSON_PATH = Path(__file__).parent / "models.json"
 
 def get_models_json_path() -> Path:
     """models.jsonファイルのパスを取得"""
-    return Path(__file__).parent / "models.json"
+    return MODELS_JSON_PATH
 
-def load_models_from_json() -> dict:
-    """JSONファイルからモデル情報を読み込む"""
+def _models_json_cache_key() -> tuple:
+    """models.jsonのキャッシュのキー（パスと更新時刻）を取得"""
     json_path = get_models_json_path()
+    try:
+        mtime_ns = json_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = 0
+    return str(json_path), mtime_ns
+
+@st.cache_data(show_spinner=False)
+def _load_models_cached(path: str, mtime_ns: int) -> dict:
+    """models.jsonを読み込む（パスと更新時刻が同じ間はキャッシュを返す）
+    
+    ファイル上のモデル一覧はリスト形式だが、読み込み後は {モデルID: エントリ} の辞書で扱う。
+    IDのないエントリや重複したIDのエントリは "_extra_models" に残し、保存時にそのまま書き戻す
+    （手動で編集されたエントリを失わないため）。
+    """
+    json_path = Path(path)
     
     if not json_path.exists():
-        return {"models": [], "last_used": {"name": "", "id": ""}}
+        return {"models": {}, "_extra_models": [], "last_used": {"name": "", "id": ""}}
     
     try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(json_path, "rb") as f:
+            data = _json_loads(f.read())
             # 旧形式の互換性
             if "models" not in data:
                 data = {"models": [], "last_used": {"name": "", "id": ""}}
+            models, extra_models = {}, []
+            for m in data["models"]:
+                if isinstance(m, dict) and m.get("id") and m["id"] not in models:
+                    models[m["id"]] = m
+                else:
+                    extra_models.append(m)
+            data["models"] = models
+            data["_extra_models"] = extra_models
             return data
     except Exception:
-        return {"models": [], "last_used": {"name": "", "id": ""}}
+        return {"models": {}, "_extra_models": [], "last_used": {"name": "", "id": ""}}
+
+def load_models_from_json() -> dict:
+    """JSONファイルからモデル情報を読み込む（再実行ごとの読み込み・パースはキャッシュで省略）"""
+    return _load_models_cached(*_models_json_cache_key())
+
+@st.cache_data(show_spinner=False)
+def _load_models_index(path: str, mtime_ns: int) -> dict:
+    """models.jsonのモデル名・モデルIDからモデルIDを引く索引を作成（更新時刻が同じ間はキャッシュ）"""
+    index = {}
+    for m in _load_models_cached(path, mtime_ns)["models"].values():
+        if m.get("id"):
+            index[m["id"]] = m["id"]
+            if m.get("name"):
+                index.setdefault(m["name"], m["id"])
+    return index
+
+def load_models_index() -> dict:
+    """{モデル名またはモデルID: モデルID} の索引を取得"""
+    return _load_models_index(*_models_json_cache_key())
+
+@st.cache_data(show_spinner=False)
+def _load_model_options(path: str, mtime_ns: int) -> tuple:
+    """モデル選択欄の選択肢と {選択肢: 位置} の辞書を作成（更新時刻が同じ間はキャッシュ）"""
+    models_dict = models_dict_from_json_data(_load_models_cached(path, mtime_ns))
+    model_options = ["デフォルト音声（モデルID未指定）"] + list(models_dict.keys())
+    return model_options, {name: i for i, name in enumerate(model_options)}
+
+def load_model_options() -> tuple:
+    """モデル選択欄の選択肢と {選択肢: 位置} の辞書を取得"""
+    return _load_model_options(*_models_json_cache_key())
+
+def models_dict_from_json_data(json_data: dict) -> dict:
+    """JSONデータから {モデル名: モデルID} の辞書を作成"""
+    return {
+        m["name"]: m["id"]
+        for m in json_data["models"].values()
+        if m.get("name") and m.get("id")
+    }
 
 def save_models_to_json(data: dict):
-    """JSONファイルにモデル情報を保存"""
+    """JSONファイルにモデル情報を保存（内容が変わらない場合は書き込まない）"""
     json_path = get_models_json_path()
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # ファイル上は従来どおりモデル一覧をリスト形式で保存
+    data = dict(data)
+    extra_models = data.pop("_extra_models", [])
+    data["models"] = list(data["models"].values()) + extra_models
+    payload = _json_dumps(data)
+    
+    try:
+        if json_path.read_bytes() == payload:
+            return
+    except FileNotFoundError:
+        pass
+    
+    # 一時ファイルに書き込んでから置き換え、書き込み途中のファイルが読まれないようにする
+    # （セッションごとのスレッドが同時に保存しても衝突しないよう、一時ファイル名は毎回別にする）
+    with tempfile.NamedTemporaryFile(dir=json_path.parent, prefix=json_path.name + ".", suffix=".tmp", delete=False) as f:
+        f.write(payload)
+    try:
+        # 一時ファイルは0600で作られるため、元のファイルのパーミッションを引き継ぐ
+        if json_path.exists():
+            shutil.copymode(json_path, f.name)
+        os.replace(f.name, json_path)
+    except OSError:
+        os.unlink(f.name)
+        raise
+    # 保存した内容を次回の読み込みで確実に反映させる
+    _load_models_cached.clear()
+    _load_models_index.clear()
+    _load_model_options.clear()
+
+def remove_models_from_data(data: dict, predicate):
+    """条件に一致するモデルをすべて削除（IDのないエントリ・重複したエントリも対象）"""
+    for key in [key for key, m in data["models"].items() if predicate(m)]:
+        del data["models"][key]
+    data["_extra_models"] = [
+        m for m in data.get("_extra_models", [])
+        if not (isinstance(m, dict) and predicate(m))
+    ]
 
 def add_model_to_json(name: str, model_id: str, description: str = ""):
     """JSONファイルにモデルを追加"""
     data = load_models_from_json()
     
     # 既存のモデルを確認（同じIDがあれば上書き、同じ名前があれば削除）
-    data["models"] = [m for m in data["models"] if m["id"] != model_id and m["name"] != name]
+    remove_models_from_data(data, lambda m: m.get("id") == model_id or m.get("name") == name)
     
     # 新しいモデルを追加
     model_entry = {
@@ -122,7 +324,7 @@ def add_model_to_json(name: str, model_id: str, description: str = ""):
         "description": description,
         "created_at": datetime.now().isoformat()
     }
-    data["models"].append(model_entry)
+    data["models"][model_id] = model_entry
     
     # 最後に使用したモデルを更新
     data["last_used"] = {"name": name, "id": model_id}
@@ -134,9 +336,9 @@ def delete_model_from_json(model_id: str = None, model_name: str = None):
     data = load_models_from_json()
     
     if model_id:
-        data["models"] = [m for m in data["models"] if m["id"] != model_id]
+        remove_models_from_data(data, lambda m: m.get("id") == model_id)
     elif model_name:
-        data["models"] = [m for m in data["models"] if m["name"] != model_name]
+        remove_models_from_data(data, lambda m: m.get("name") == model_name)
     
     # 最後に使用したモデルが削除された場合、リセット
     last_used = data.get("last_used", {})
@@ -147,9 +349,18 @@ def delete_model_from_json(model_id: str = None, model_name: str = None):
     return True
 
 def get_session():
-    """Fish Audioセッションを取得"""
-    from fish_audio_sdk import Session
-    return Session(st.session_state.fish_audio_api_key)
+    """Fish Audioセッションを取得（APIキーごとに再利用し、接続プールを使い回す）"""
+    return get_fish_session(st.session_state.fish_audio_api_key)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_credit_cached(api_key: str):
+    """クレジット残高を取得（60秒間はAPIを呼ばずに前回の結果を返す）"""
+    return get_fish_session(api_key).get_api_credit().credit
+
+@st.cache_data(ttl=60, show_spinner=False)
+def list_models_cached(api_key: str, page_size: int = 20) -> list:
+    """自分のモデル一覧を取得（60秒間はAPIを呼ばずに前回の結果を返す）"""
+    return get_fish_session(api_key).list_models(self_only=True, page_size=page_size).items
 
 def update_models_dict():
     """モデルリストからモデル辞書を更新（JSONファイルは更新しない）"""
@@ -159,45 +370,191 @@ def update_models_dict():
         api_models_dict[model.title] = model.id
     
     # JSONファイルから読み込んだモデルを優先（ユーザーが管理しているモデル）
-    json_data = load_models_from_json()
-    json_models_dict = {}
-    for model_entry in json_data.get("models", []):
-        name = model_entry.get("name", "")
-        model_id = model_entry.get("id", "")
-        if name and model_id:
-            json_models_dict[name] = model_id
+    json_models_dict = models_dict_from_json_data(load_models_from_json())
     
     # JSONに保存されているモデルを優先して辞書を構築
     # これにより、削除したモデルはJSONから削除されていれば表示されない
     st.session_state.models_dict = json_models_dict
 
+@st.cache_resource(show_spinner="Whisperモデルを読み込んでいます（初回のみ）...")
+def get_whisper_model(name: str = WHISPER_MODEL_SIZES[0]):
+    """Whisperモデルを読み込む（全セッション・再実行で1つのインスタンスを共有）"""
+    if FASTER_WHISPER_AVAILABLE:
+        import ctranslate2
+        from faster_whisper import WhisperModel
+        
+        # GPUがあればFP16、CPUではint8で推論（C++実装のデコードと融合カーネルで高速）
+        if ctranslate2.get_cuda_device_count() > 0:
+            return WhisperModel(name, device="cuda", compute_type="float16")
+        return WhisperModel(name, device="cpu", compute_type="int8", cpu_threads=os.cpu_count())
+    
+    import torch
+    import whisper
+    
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = whisper.load_model(name, device=device)
+    
+    if device == "cpu":
+        # CPUではLinear層をint8に動的量子化する（推論の高速化とメモリ削減）
+        # Whisper独自のLinearはquantize_dynamicの対象外のため、標準のnn.Linearとして扱う
+        # （独自のLinearはforward時のdtype合わせのみで、CPUのFP32推論では同じ動作）
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear):
+                module.__class__ = torch.nn.Linear
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        
+        # エンコーダーをコンパイルしてAttention・LayerNormなどの演算を融合する
+        # （コンパイルの失敗は初回呼び出しまで分からないため、ウォームアップで確認し、
+        #   失敗した場合は通常の実行に戻す）
+        if hasattr(torch, "compile"):
+            eager_encoder = model.encoder
+            try:
+                model.encoder = torch.compile(eager_encoder)
+                dummy_mel = torch.zeros(1, model.dims.n_mels, whisper.audio.N_FRAMES)
+                with torch.inference_mode():
+                    model.encoder(dummy_mel)
+            except Exception:
+                model.encoder = eager_encoder
+    
+    return model
+
+@st.cache_resource
+def start_whisper_preload(name: str = WHISPER_MODEL_SIZES[0]):
+    """Whisperモデルの読み込みをバックグラウンドで開始（プロセスごとに1回のみ）
+    
+    get_whisper_modelのキャッシュを事前に温めておき、最初のアップロード時の待ち時間を隠す。
+    読み込み中にアップロードされた場合は、同じキャッシュの読み込み完了を待つ。
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    return executor.submit(get_whisper_model, name)
+
+def get_uploaded_file_path(uploaded_file) -> str:
+    """アップロードされたファイルを一時ファイルに書き出してパスを返す
+    
+    同じファイル（file_id）であれば、自動文字起こしとモデル作成で同じ一時ファイルを再利用する。
+    """
+    cached = st.session_state.get("uploaded_temp_file")
+    if cached and cached.file_id == uploaded_file.file_id and os.path.exists(cached.path):
+        return cached.path
+    
+    # 以前のファイルの一時ファイルは不要になるので削除
+    discard_uploaded_temp_file()
+    
+    # ファイル全体をメモリ上のbytesにせず、固定サイズのバッファでディスクへ書き出す
+    file_ext = uploaded_file.name.split('.')[-1] if uploaded_file.name else "wav"
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_ext}") as tmp_file:
+        uploaded_file.seek(0)
+        shutil.copyfileobj(uploaded_file, tmp_file, length=1 << 20)
+        tmp_path = tmp_file.name
+    
+    st.session_state.uploaded_temp_file = UploadedTempFile(file_id=uploaded_file.file_id, path=tmp_path)
+    return tmp_path
+
+def discard_uploaded_temp_file():
+    """get_uploaded_file_pathで作成した一時ファイルを削除"""
+    cached = st.session_state.pop("uploaded_temp_file", None)
+    if cached:
+        cached.remove()
+
+def file_digest(path: str) -> str:
+    """ファイル内容のハッシュ値を計算（固定サイズのバッファで読み込む）"""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def pcm_to_wav(pcm_bytes: bytes) -> bytes:
+    """PCMにWAVヘッダーを付ける（ブラウザで再生するため。再エンコードはしない）"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(PCM_SAMPLE_RATE)
+        wav_file.writeframes(pcm_bytes)
+    return buffer.getvalue()
+
+def prepare_upload_data(audio_file_path: str, compress: bool) -> bytes:
+    """モデル作成時に送信するOpus圧縮済みデータを取得（作成の再試行時に再変換しない）
+    
+    圧縮しない場合や圧縮に失敗した場合はNoneを返す（元のファイルをそのまま送信する）。
+    """
+    if not compress or Path(audio_file_path).suffix.lower() not in LOSSLESS_SUFFIXES:
+        return None
+    
+    # 音声内容のハッシュ値ごとに保持し、古いデータは破棄する
+    cache = st.session_state.setdefault("upload_cache", {})
+    now = time.monotonic()
+    for key in [key for key, (_, created) in cache.items() if now - created > UPLOAD_CACHE_TTL]:
+        del cache[key]
+    
+    key = file_digest(audio_file_path)
+    if key not in cache:
+        data = compress_to_opus(audio_file_path)
+        if data is None:
+            return None
+        cache[key] = (data, now)
+    return cache[key][0]
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_audio_16k(audio_digest: str, _audio_file_path: str):
+    """音声を16kHzモノラルのfloat32配列に変換（Whisperの入力形式。同じ内容は一度だけデコード）"""
+    if FASTER_WHISPER_AVAILABLE:
+        from faster_whisper import decode_audio
+        return decode_audio(_audio_file_path, sampling_rate=16000)
+    import whisper
+    return whisper.load_audio(_audio_file_path)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _transcribe_cached(audio_digest: str, language: str, model_name: str, _audio_file_path: str) -> str:
+    """音声内容のハッシュ値・言語・モデルをキーに文字起こし結果をキャッシュ（パスはキーに含めない）"""
+    # Whisperモデルの取得（プロセス全体でキャッシュ）
+    model = get_whisper_model(model_name)
+    
+    # 16kHzモノラルに変換済みの配列を渡す（Whisper内部での再デコード・リサンプリングを省く）
+    audio = _load_audio_16k(audio_digest, _audio_file_path)
+    
+    # 音声認識を実行
+    if FASTER_WHISPER_AVAILABLE:
+        # beam_size=1でデコード量を削減し、VADで無音区間をスキップする
+        segments, _ = model.transcribe(
+            audio,
+            language=language,
+            beam_size=1,
+            vad_filter=True
+        )
+        return "".join(segment.text for segment in segments).strip()
+    
+    result = model.transcribe(
+        audio,
+        language=language,
+        task="transcribe",
+        fp16=model.device.type == "cuda"  # GPUではFP16で推論
+    )
+    
+    text = result["text"].strip()
+    return text
+
 def transcribe_audio_with_whisper(audio_file_path: str, language: str = "ja") -> str:
-    """Whisperを使用して音声ファイルを文字起こし"""
+    """Whisperを使用して音声ファイルを文字起こし（同じ内容の音声は結果を再利用）"""
     if not WHISPER_AVAILABLE:
         return ""
     
     try:
-        # Whisperモデルの読み込み（初回のみ、セッション状態にキャッシュ）
-        if "whisper_model" not in st.session_state:
-            with st.spinner("Whisperモデルを読み込んでいます（初回のみ）..."):
-                st.session_state.whisper_model = whisper.load_model("base")
-        
-        model = st.session_state.whisper_model
-        
-        # 音声認識を実行
-        result = model.transcribe(
-            audio_file_path,
-            language=language,
-            task="transcribe",
-            fp16=False
-        )
-        
-        text = result["text"].strip()
-        return text
+        model_name = st.session_state.get("whisper_model_size", WHISPER_MODEL_SIZES[0])
+        return _transcribe_cached(file_digest(audio_file_path), language, model_name, audio_file_path)
     except Exception as e:
         st.warning(f"文字起こしに失敗しました: {e}")
         return ""
 
+def update_model_index():
+    """{モデル名またはモデルID: モデルID} の索引をセッション状態に作成（再実行ごとに1回）"""
+    # APIから取得したモデルのID
+    model_index = {model.id: model.id for model in st.session_state.models}
+    # JSONファイルのモデル（名前・ID）を優先
+    model_index.update(load_models_index())
+    st.session_state.model_index = model_index
+
 def get_model_id_from_name_or_id(model_input: str) -> str:
     """モデル名またはIDからモデルIDを取得"""
     if not model_input or not model_input.strip():
@@ -205,25 +562,8 @@ def get_model_id_from_name_or_id(model_input: str) -> str:
     
     model_input = model_input.strip()
     
-    # モデル名で検索（セッション状態の辞書）
-    if model_input in st.session_state.models_dict:
-        return st.session_state.models_dict[model_input]
-    
-    # JSONファイルからも検索
-    json_data = load_models_from_json()
-    for model_entry in json_data.get("models", []):
-        if model_entry.get("name") == model_input:
-            return model_entry.get("id")
-        if model_entry.get("id") == model_input:
-            return model_entry.get("id")
-    
-    # APIから取得したモデルリストで検索
-    for model in st.session_state.models:
-        if model.id == model_input:
-            return model.id
-    
-    # そのまま返す（API側で検証される）
-    return model_input
+    # 索引になければそのまま返す（API側で検証される）
+    return st.session_state.model_index.get(model_input, model_input)
 
 def sidebar():
     """サイドバーの設定"""
@@ -249,11 +589,20 @@ def sidebar():
             st.markdown("---")
             if st.button("📊 クレジット残高を確認"):
                 try:
-                    session = get_session()
-                    credit = session.get_api_credit()
-                    st.success(f"クレジット残高: {credit.credit}")
+                    credit = get_credit_cached(st.session_state.fish_audio_api_key)
+                    st.success(f"クレジット残高: {credit}")
                 except Exception as e:
                     st.error(f"エラー: {e}")
+        
+        # 自動文字起こしに使うWhisperモデル
+        if WHISPER_AVAILABLE:
+            st.markdown("---")
+            st.selectbox(
+                "文字起こしモデル（Whisper）",
+                WHISPER_MODEL_SIZES,
+                key="whisper_model_size",
+                help="小さいモデルほど高速です。精度が不足する場合は大きいモデルを選択してください。"
+            )
 
 def page_create_voice_clone():
     """音声クローンモデル作成ページ"""
@@ -276,49 +625,29 @@ def page_create_voice_clone():
             label_visibility="collapsed"
         )
     
-    # 新しいファイルがアップロードされたら、以前の文字起こし結果をクリア
+    # 新しいファイルがアップロードされたら、文字起こしの状態を作り直す（以前の結果はクリア）
+    tx = st.session_state.get("tx")
+    if uploaded_file is None:
+        # アップロードが取り消されたら、書き出した音声を残さない
+        discard_uploaded_temp_file()
     if uploaded_file:
-        if "last_uploaded_file_name" not in st.session_state:
-            st.session_state.last_uploaded_file_name = None
-        
-        if st.session_state.last_uploaded_file_name != uploaded_file.name:
-            # 新しいファイルがアップロードされた
-            st.session_state.last_uploaded_file_name = uploaded_file.name
-            if "transcription_auto_text" in st.session_state:
-                del st.session_state.transcription_auto_text
+        if tx is None or tx.file_id != uploaded_file.file_id:
+            tx = st.session_state.tx = TxState(file_id=uploaded_file.file_id)
             # テキストエリアの入力もクリア
-            if "transcription_input" in st.session_state:
-                st.session_state.transcription_input = ""
-            # ユーザー編集フラグをリセット
-            if "transcription_edited_by_user" in st.session_state:
-                del st.session_state.transcription_edited_by_user
-            # 処理済みファイルをリセットして再処理可能にする
-            if "last_processed_file" in st.session_state:
-                del st.session_state.last_processed_file
-            # 自動適用フラグもクリア（既存のファイル名のフラグをすべてクリア）
-            keys_to_delete = [key for key in st.session_state.keys() if key.startswith("transcription_auto_applied_")]
-            for key in keys_to_delete:
-                del st.session_state[key]
+            st.session_state.transcription_input = ""
     
     # 自動文字起こしの実行（音声ファイルアップロード後、フォーム表示前に実行）
-    current_file_name = None
     if uploaded_file is not None:
         # 自動文字起こしが有効で、新しいファイルがアップロードされた場合
         if "auto_transcribe_enabled" not in st.session_state:
             st.session_state.auto_transcribe_enabled = True  # デフォルトで有効
         
-        if "last_processed_file" not in st.session_state:
-            st.session_state.last_processed_file = None
-        
-        current_file_name = uploaded_file.name if hasattr(uploaded_file, 'name') else None
-        
         auto_transcribe_enabled = st.session_state.get("auto_transcribe_enabled", True)
         
-        # 文字起こし実行条件のチェック
+        # 文字起こし実行条件のチェック（このファイルの文字起こし結果がまだない場合）
         should_transcribe = (
             auto_transcribe_enabled and 
-            current_file_name and 
-            current_file_name != st.session_state.last_processed_file and
+            not tx.auto_text and
             WHISPER_AVAILABLE
         )
         
@@ -326,49 +655,36 @@ def page_create_voice_clone():
             # 自動文字起こしを実行
             try:
                 with st.spinner("🎤 音声を自動文字起こし中（音声クローン作成の精度向上のため）..."):
-                    # アップロードされたファイルを読み込む
-                    file_bytes = uploaded_file.getvalue()
-                    file_ext = current_file_name.split('.')[-1] if current_file_name else "wav"
-                    
-                    # 一時ファイルに保存してWhisperで処理
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_ext}") as tmp_audio:
-                        tmp_audio.write(file_bytes)
-                        tmp_audio_path = tmp_audio.name
+                    # 一時ファイルに保存してWhisperで処理（モデル作成時にも再利用）
+                    tmp_audio_path = get_uploaded_file_path(uploaded_file)
                     
                     try:
                         transcribed_text = transcribe_audio_with_whisper(tmp_audio_path)
                         if transcribed_text:
-                            st.session_state.transcription_auto_text = transcribed_text
+                            tx.auto_text = transcribed_text
                             # ユーザーが編集していない場合のみ、テキストエリアに反映
-                            if not st.session_state.get("transcription_edited_by_user", False):
+                            if not tx.edited:
                                 st.session_state.transcription_input = transcribed_text
-                            st.session_state.last_processed_file = current_file_name
                             # 自動適用フラグをリセット（新しい文字起こし結果なので）
-                            auto_applied_key = f"transcription_auto_applied_{current_file_name}"
-                            st.session_state[auto_applied_key] = False
+                            tx.applied = False
                             st.success("✅ 自動文字起こしが完了しました。文字起こし欄に結果が表示されます。")
                             st.rerun()  # 結果を表示するために再レンダリング
                         else:
                             st.warning("⚠️ 文字起こし結果が空でした。手動で入力してください。")
                     except Exception as e:
+                        discard_uploaded_temp_file()
                         st.error(f"❌ 文字起こしエラー: {e}")
-                        import traceback
-                        with st.expander("詳細なエラー情報"):
-                            st.code(traceback.format_exc())
-                    finally:
-                        if os.path.exists(tmp_audio_path):
-                            os.unlink(tmp_audio_path)
+                        show_error_details(e)
             except Exception as e:
+                discard_uploaded_temp_file()
                 st.error(f"❌ ファイル読み込みエラー: {e}")
-                import traceback
-                with st.expander("詳細なエラー情報"):
-                    st.code(traceback.format_exc())
+                show_error_details(e)
         
         # 文字起こし処理中の表示
         if should_transcribe:
             pass  # 上でspinnerが表示される
         elif auto_transcribe_enabled and not WHISPER_AVAILABLE:
-            st.warning("⚠️ Whisperがインストールされていません。自動文字起こしを使用するには `pip install openai-whisper` を実行してください。")
+            st.warning("⚠️ Whisperがインストールされていません。自動文字起こしを使用するには `pip install faster-whisper`（または `pip install openai-whisper`）を実行してください。")
     
     # モデル設定フォーム
     st.markdown("---")
@@ -397,6 +713,13 @@ def page_create_voice_clone():
                 help="モデルの公開設定",
                 key="visibility_select"
             )
+            
+            compress_upload = st.checkbox(
+                "📦 アップロード前にOpusへ圧縮",
+                value=False,
+                help="WAV・FLACをOpusに変換して送信量を減らします（ffmpegが必要です）",
+                key="compress_upload_checkbox"
+            )
         
         # 文字起こしエリア（フォーム内）- 自動文字起こし結果をここに表示
         st.markdown("#### 📝 文字起こし（推奨）")
@@ -413,7 +736,7 @@ def page_create_voice_clone():
             try:
                 # 音声ファイルのフォーマットを判定
                 file_ext = current_file_name_in_form.split('.')[-1].lower() if current_file_name_in_form else "wav"
-                audio_format = f"audio/{file_ext}" if file_ext in ["wav", "mp3", "m4a", "ogg"] else "audio/wav"
+                audio_format = FORMAT_MIME.get(file_ext, "audio/wav")
                 
                 # ファイルを読み込んで再生（ファイルポインタをリセット）
                 current_file_from_session.seek(0)
@@ -426,28 +749,13 @@ def page_create_voice_clone():
         # 自動文字起こし結果をセッション状態と同期（ウィジェット作成前に実行）
         if "transcription_input" not in st.session_state:
             st.session_state.transcription_input = ""
-        if "transcription_edited_by_user" not in st.session_state:
-            st.session_state.transcription_edited_by_user = False
-        
-        # 新しい自動文字起こし結果がある場合のみ、テキストエリアを更新
-        # ただし、ユーザーが既に編集している場合は上書きしない
-        # ウィジェット作成前に適用する必要がある
-        if "transcription_auto_text" in st.session_state and st.session_state.transcription_auto_text:
-            # 新しいファイルがアップロードされて自動文字起こしが実行された直後のみ更新
-            # かつ、まだ適用されていない場合（transcription_auto_appliedフラグで管理）
-            # かつ、ユーザーが編集していない場合
-            if ("last_processed_file" in st.session_state and 
-                current_file_name_in_form and 
-                current_file_name_in_form == st.session_state.last_processed_file):
-                # 自動適用フラグをチェック
-                auto_applied_key = f"transcription_auto_applied_{current_file_name_in_form}"
-                if (not st.session_state.get(auto_applied_key, False) and 
-                    not st.session_state.transcription_edited_by_user):
-                    # ユーザーが編集していない場合のみ、自動文字起こし結果を適用
-                    # ウィジェット作成前に適用する
-                    st.session_state.transcription_input = st.session_state.transcription_auto_text
-                    st.session_state.transcription_edited_by_user = False  # 自動入力なので編集フラグはFalse
-                    st.session_state[auto_applied_key] = True  # 適用済みフラグを設定
+        
+        # 現在のファイルの自動文字起こし結果が未適用で、ユーザーが編集していない場合のみ、
+        # テキストエリアを更新する（ウィジェット作成前に適用する必要がある）
+        if (current_file_from_session and tx and tx.file_id == current_file_from_session.file_id and
+                tx.auto_text and not tx.applied and not tx.edited):
+            st.session_state.transcription_input = tx.auto_text
+            tx.applied = True  # 適用済みフラグを設定
         
         # valueパラメータを使わず、keyのみでセッション状態から値を取得
         # この時点で、自動文字起こし結果が適用されている場合は、その値が表示される
@@ -504,16 +812,12 @@ def page_create_voice_clone():
             # ユーザーが編集したと判断し、編集フラグを設定（次回のレンダリング時に反映）
             # ただし、ウィジェットが作成された後なので、セッション状態は直接変更できない
             # 代わりに、別のキーを使用して編集状態を記録
-            if final_transcription:
+            if final_transcription and tx:
                 # 自動適用フラグを設定して、以降の上書きを防ぐ
-                if current_file_name_in_form:
-                    auto_applied_key = f"transcription_auto_applied_{current_file_name_in_form}"
-                    st.session_state[auto_applied_key] = True
+                tx.applied = True
                 # 編集済みフラグも設定（次回レンダリング時に反映される）
-                if ("transcription_auto_text" in st.session_state and 
-                    st.session_state.transcription_auto_text and
-                    final_transcription != st.session_state.transcription_auto_text):
-                    st.session_state.transcription_edited_by_user = True
+                if tx.auto_text and final_transcription != tx.auto_text:
+                    tx.edited = True
             
             if not final_transcription:
                 st.warning("⚠️ 文字起こしが入力されていません。音声クローンの精度向上のため、文字起こしの入力をおすすめします。")
@@ -522,23 +826,33 @@ def page_create_voice_clone():
                     st.stop()
                 final_transcription = ""
             
-            # 一時ファイルに保存
-            file_ext = submitted_file.name.split('.')[-1] if hasattr(submitted_file, 'name') else "wav"
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_ext}") as tmp_file:
-                submitted_file.seek(0)  # ファイルポインタをリセット
-                tmp_file.write(submitted_file.read())
-                tmp_path = tmp_file.name
+            # 一時ファイルに保存（自動文字起こしで保存済みであれば再利用）
+            tmp_path = get_uploaded_file_path(submitted_file)
             
             try:
-                with st.spinner("音声クローンモデルを作成中... この処理には時間がかかる場合があります。"):
-                    model_id = create_voice_clone_model(
-                        api_key=st.session_state.fish_audio_api_key,
-                        audio_file_path=tmp_path,
-                        model_title=model_title,
-                        model_description=model_description,
-                        transcription=final_transcription,
-                        visibility=visibility
-                    )
+                status_label = "音声クローンモデルを作成中... この処理には時間がかかる場合があります。"
+                with st.status(status_label) as status:
+                    voice_data = prepare_upload_data(tmp_path, compress_upload)
+                    
+                    # APIの呼び出しは別スレッドで行い、待ち時間中も経過時間の表示を更新する
+                    model_id = asyncio.run(run_with_status(
+                        create_voice_clone_model_async(
+                            api_key=st.session_state.fish_audio_api_key,
+                            audio_file_path=tmp_path,
+                            model_title=model_title,
+                            model_description=model_description,
+                            transcription=final_transcription,
+                            visibility=visibility,
+                            voice_data=voice_data
+                        ),
+                        status,
+                        status_label
+                    ))
+                    status.update(label="✅ アップロードが完了しました", state="complete")
+                
+                # 作成したモデルと消費したクレジットが次の取得で反映されるようにする
+                list_models_cached.clear()
+                get_credit_cached.clear()
                 
                 st.success("✅ モデルの作成が完了しました！")
                 
@@ -556,13 +870,10 @@ def page_create_voice_clone():
                 add_model_to_json(model_title, model_id, model_description)
                 
                 # モデル辞書に追加（JSONから再読み込みして更新）
-                json_data = load_models_from_json()
-                st.session_state.models_dict = {}
-                for model_entry in json_data.get("models", []):
-                    name = model_entry.get("name", "")
-                    mid = model_entry.get("id", "")
-                    if name and mid:
-                        st.session_state.models_dict[name] = mid
+                st.session_state.models_dict = models_dict_from_json_data(load_models_from_json())
+                
+                # 一時ファイルを削除
+                discard_uploaded_temp_file()
                 
                 st.balloons()
                 
@@ -570,14 +881,116 @@ def page_create_voice_clone():
                 st.info("💡 TTS生成タブで、作成したモデルを選択して使用できます。")
                 
             except Exception as e:
+                # 再試行時は再度書き出す（圧縮済みデータは内容のハッシュ値で再利用される）
+                discard_uploaded_temp_file()
                 st.error(f"❌ エラーが発生しました: {e}")
-                import traceback
-                with st.expander("詳細なエラー情報"):
-                    st.code(traceback.format_exc())
-            finally:
-                # 一時ファイルを削除
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+                show_error_details(e)
+
+@st.fragment
+def model_manager():
+    """モデル管理・一覧セクション（表の操作時はこのフラグメントのみ再実行）
+    
+    選択・削除はモデル選択欄にも反映する必要があるため、アプリ全体を再実行する。
+    """
+    st.markdown("---")
+    st.markdown("#### 📋 モデル管理・一覧")
+    
+    json_models = list(load_models_from_json()["models"].values())
+    
+    if json_models:
+        # モデル一覧を1つの表として表示（モデルごとにボタンを並べるとウィジェット数が増えるため）
+        models_df = pd.DataFrame({
+            "name": [m.get("name", "") for m in json_models],
+            "id": [m.get("id", "") for m in json_models],
+            "detail": [m.get("id", "") in st.session_state.detail_visible for m in json_models],
+            "select": False,
+            "delete": False,
+        })
+        
+        # 選択・削除の後は表の編集状態をリセットするため、キーを切り替える
+        editor_version = st.session_state.get("model_editor_version", 0)
+        edited_df = st.data_editor(
+            models_df,
+            column_config={
+                "name": st.column_config.TextColumn("モデル名"),
+                "id": st.column_config.TextColumn("モデルID"),
+                "detail": st.column_config.CheckboxColumn("📝 詳細"),
+                "select": st.column_config.CheckboxColumn("✅ 選択"),
+                "delete": st.column_config.CheckboxColumn("🗑️ 削除"),
+            },
+            disabled=["name", "id"],
+            hide_index=True,
+            num_rows="fixed",
+            use_container_width=True,
+            key=f"model_editor_{editor_version}"
+        )
+        
+        # 詳細表示の状態を保存（選択・削除で表がリセットされても維持する。一覧にないモデルのIDは残らない）
+        st.session_state.detail_visible = set(edited_df.loc[edited_df["detail"], "id"])
+        
+        # 選択（複数チェックされた場合は先頭のモデル）
+        if edited_df["select"].any():
+            row = edited_df.loc[edited_df["select"].idxmax()]
+            model_name, model_id = row["name"], row["id"]
+            st.session_state.last_model_id = model_id
+            st.session_state.last_model_name = model_name
+            # JSONファイルの最後に使用したモデルを更新
+            json_data = load_models_from_json()
+            json_data["last_used"] = {"name": model_name, "id": model_id}
+            save_models_to_json(json_data)
+            st.session_state.model_editor_version = editor_version + 1
+            st.success(f"モデル '{model_name}' を選択しました！")
+            st.rerun()
+        
+        # 削除
+        if edited_df["delete"].any():
+            try:
+                for model_name, model_id in edited_df.loc[edited_df["delete"], ["name", "id"]].itertuples(index=False):
+                    # APIからも削除を試みる
+                    try:
+                        session = get_session()
+                        session.delete_model(model_id)
+                        list_models_cached.clear()
+                    except Exception:
+                        pass  # APIからの削除に失敗しても続行
+                    
+                    # JSONから削除
+                    delete_model_from_json(model_id=model_id)
+                    st.success(f"モデル '{model_name}' を削除しました。")
+                    
+                    # セッション状態を更新
+                    if st.session_state.last_model_id == model_id:
+                        st.session_state.last_model_id = ""
+                        st.session_state.last_model_name = ""
+                
+                st.session_state.model_editor_version = editor_version + 1
+                st.rerun()
+            except Exception as e:
+                st.error(f"削除エラー: {e}")
+        
+        # 詳細表示セクション（詳細にチェックしたモデルの詳細情報をまとめて表示）
+        detail_models = [m for m in json_models if m.get("id", "") in st.session_state.detail_visible]
+        
+        if detail_models:
+            st.markdown("---")
+            st.markdown("#### 📋 詳細情報")
+            for model_entry in detail_models:
+                model_name = model_entry.get("name", "")
+                model_id = model_entry.get("id", "")
+                model_desc = model_entry.get("description", "")
+                
+                with st.expander(f"📝 {model_name}", expanded=True):
+                    col_detail1, col_detail2 = st.columns([1, 1])
+                    with col_detail1:
+                        st.write(f"**モデル名:** {model_name}")
+                        st.write(f"**モデルID:** `{model_id}`")
+                    with col_detail2:
+                        if model_desc:
+                            st.write(f"**説明:** {model_desc}")
+                        else:
+                            st.write("**説明:** （説明なし）")
+    else:
+        st.info("登録されているモデルがありません。「🎤 音声クローン作成」タブでモデルを作成してください。")
 
 def page_generate_tts():
     """TTS生成ページ"""
@@ -590,56 +1003,39 @@ def page_generate_tts():
     
     # JSONファイルからモデルリストを読み込む（確実に取得）
     json_data = load_models_from_json()
-    json_models = json_data.get("models", [])
     
     # models_dictを更新（JSONから読み込んだモデルで更新）
-    models_dict_from_json = {}
-    for model_entry in json_models:
-        name = model_entry.get("name", "")
-        model_id = model_entry.get("id", "")
-        if name and model_id:
-            models_dict_from_json[name] = model_id
+    models_dict_from_json = models_dict_from_json_data(json_data)
     
     # セッション状態のmodels_dictも更新
     st.session_state.models_dict = models_dict_from_json
+    # モデルIDからモデル名を引く逆引き辞書
+    id_to_name = {model_id: name for name, model_id in models_dict_from_json.items()}
+    # モデル名・IDの索引も更新
+    update_model_index()
     
     # モデル一覧と管理機能
     st.markdown("### 📋 モデル一覧と管理")
     
-    # モデルオプションの準備
-    if models_dict_from_json:
-        model_options = ["デフォルト音声（モデルID未指定）"] + list(models_dict_from_json.keys())
-        default_index = 0
-        if st.session_state.last_model_name and st.session_state.last_model_name in models_dict_from_json:
-            try:
-                default_index = model_options.index(st.session_state.last_model_name)
-            except ValueError:
-                default_index = 0
-    else:
-        model_options = ["デフォルト音声（モデルID未指定）"]
-        default_index = 0
+    # モデルオプションの準備（選択肢はmodels.jsonが更新されるまでキャッシュ）
+    model_options, option_positions = load_model_options()
+    default_index = option_positions.get(st.session_state.last_model_name, 0) if st.session_state.last_model_name else 0
     
     # モデル一覧の表示と管理ボタン
     col_refresh, col_manage = st.columns([1, 1])
     with col_refresh:
         if st.button("🔄 モデル一覧を更新", use_container_width=True):
+            # 明示的な更新では60秒のキャッシュを使わず、最新の状態を取得する
+            list_models_cached.clear()
+            get_credit_cached.clear()
             try:
-                session = get_session()
-                models_response = session.list_models(self_only=True, page_size=20)
-                if models_response.items:
-                    st.session_state.models = models_response.items
+                models_items = list_models_cached(st.session_state.fish_audio_api_key, page_size=20)
+                if models_items:
+                    st.session_state.models = models_items
                     # update_models_dict()は呼ばない（JSONを更新しない）
                     # JSONからモデルリストを再読み込み
-                    json_data = load_models_from_json()
-                    json_models = json_data.get("models", [])
-                    models_dict_from_json = {}
-                    for model_entry in json_models:
-                        name = model_entry.get("name", "")
-                        model_id = model_entry.get("id", "")
-                        if name and model_id:
-                            models_dict_from_json[name] = model_id
-                    st.session_state.models_dict = models_dict_from_json
-                    st.success(f"✅ APIから {len(models_response.items)}個のモデルを取得しました（JSONに保存されているモデルのみ表示されます）")
+                    st.session_state.models_dict = models_dict_from_json_data(load_models_from_json())
+                    st.success(f"✅ APIから {len(models_items)}個のモデルを取得しました（JSONに保存されているモデルのみ表示されます）")
                     st.rerun()
             except Exception as e:
                 st.error(f"エラー: {e}")
@@ -651,92 +1047,7 @@ def page_generate_tts():
     
     # 統合されたモデル管理・一覧セクション
     if st.session_state.get("show_model_management", False):
-        st.markdown("---")
-        st.markdown("#### 📋 モデル管理・一覧")
-        
-        if json_models:
-            # シンプルなモデル一覧表示
-            for i, model_entry in enumerate(json_models):
-                model_name = model_entry.get("name", "")
-                model_id = model_entry.get("id", "")
-                
-                # 詳細表示の状態を取得
-                detail_key = f"show_detail_{model_id}"
-                is_detail_visible = st.session_state.get(detail_key, False)
-                
-                col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
-                with col1:
-                    st.write(f"**{model_name}** (ID: `{model_id[:8]}...`)")
-                with col2:
-                    # 詳細ボタン（トグル表示）
-                    button_label = "🔽 非表示" if is_detail_visible else "📝 詳細"
-                    if st.button(button_label, key=f"detail_model_{i}", use_container_width=True):
-                        # 詳細表示のトグル
-                        st.session_state[detail_key] = not is_detail_visible
-                        st.rerun()
-                with col3:
-                    # 選択ボタン
-                    if st.button("✅ 選択", key=f"select_model_{i}", use_container_width=True):
-                        st.session_state.last_model_id = model_id
-                        st.session_state.last_model_name = model_name
-                        # JSONファイルの最後に使用したモデルを更新
-                        json_data = load_models_from_json()
-                        json_data["last_used"] = {"name": model_name, "id": model_id}
-                        save_models_to_json(json_data)
-                        st.success(f"モデル '{model_name}' を選択しました！")
-                        st.rerun()
-                with col4:
-                    # 削除ボタン
-                    if st.button("🗑️ 削除", key=f"delete_model_{i}", use_container_width=True, type="secondary"):
-                        try:
-                            # APIからも削除を試みる
-                            try:
-                                session = get_session()
-                                session.delete_model(model_id)
-                            except Exception:
-                                pass  # APIからの削除に失敗しても続行
-                            
-                            # JSONから削除
-                            delete_model_from_json(model_id=model_id)
-                            st.success(f"モデル '{model_name}' を削除しました。")
-                            
-                            # セッション状態を更新
-                            if st.session_state.last_model_id == model_id:
-                                st.session_state.last_model_id = ""
-                                st.session_state.last_model_name = ""
-                            
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"削除エラー: {e}")
-            
-            # 詳細表示セクション（詳細ボタンを押したモデルの詳細情報をまとめて表示）
-            detail_models = []
-            for model_entry in json_models:
-                model_id = model_entry.get("id", "")
-                detail_key = f"show_detail_{model_id}"
-                if st.session_state.get(detail_key, False):
-                    detail_models.append(model_entry)
-            
-            if detail_models:
-                st.markdown("---")
-                st.markdown("#### 📋 詳細情報")
-                for model_entry in detail_models:
-                    model_name = model_entry.get("name", "")
-                    model_id = model_entry.get("id", "")
-                    model_desc = model_entry.get("description", "")
-                    
-                    with st.expander(f"📝 {model_name}", expanded=True):
-                        col_detail1, col_detail2 = st.columns([1, 1])
-                        with col_detail1:
-                            st.write(f"**モデル名:** {model_name}")
-                            st.write(f"**モデルID:** `{model_id}`")
-                        with col_detail2:
-                            if model_desc:
-                                st.write(f"**説明:** {model_desc}")
-                            else:
-                                st.write("**説明:** （説明なし）")
-        else:
-            st.info("登録されているモデルがありません。「🎤 音声クローン作成」タブでモデルを作成してください。")
+        model_manager()
     
     if not models_dict_from_json:
         st.info("📝 モデルを作成するには、「🎤 音声クローン作成」タブでモデルを作成してください。")
@@ -776,6 +1087,7 @@ def page_generate_tts():
                 )
                 selected_model_id = get_model_id_from_name_or_id(model_input) if model_input else None
                 selected_model_display = model_input if model_input else "デフォルト音声"
+                selected_model_name = None
             
             # 選択されたモデルの情報を表示
             if selected_model_id:
@@ -788,6 +1100,12 @@ def page_generate_tts():
                 help="出力音声ファイルの形式"
             )
             
+            preview_optimized = st.checkbox(
+                "🎧 試聴向けにOpusで生成",
+                value=False,
+                help="出力形式に関わらず、軽量なOpusで生成します（生成・転送が速くなります）"
+            )
+            
             speed = st.slider(
                 "話速",
                 min_value=0.5,
@@ -809,6 +1127,9 @@ def page_generate_tts():
         submitted = st.form_submit_button("🎵 音声を生成", use_container_width=True)
         
         if submitted:
+            if preview_optimized:
+                format = "opus"
+            
             if not text.strip():
                 st.error("⚠️ テキストを入力してください。")
                 st.session_state.tts_output_file = None
@@ -817,75 +1138,83 @@ def page_generate_tts():
             
             try:
                 with st.spinner("音声を生成中..."):
-                    output_file = generate_tts(
+                    # ファイルに書き出して読み直さず、受信したチャンクをメモリ上に直接受け取る
+                    audio_buffer = io.BytesIO()
+                    preview = st.empty()
+                    last_preview = time.monotonic()
+                    for chunk in iter_tts(
                         api_key=st.session_state.fish_audio_api_key,
                         text=text,
                         model_id=selected_model_id,
-                        output_file=None,  # 自動生成
                         format=format,
                         speed=speed,
                         volume=volume
-                    )
+                    ):
+                        audio_buffer.write(chunk)
+                        if time.monotonic() - last_preview < TTS_PREVIEW_INTERVAL:
+                            continue
+                        last_preview = time.monotonic()
+                        # プレイヤーを差し替えると再生が途切れるため、生成中は受信量のみ表示する
+                        preview.caption(f"受信中... {audio_buffer.tell() // 1024} KB")
+                    preview.empty()
                 
-                # 音声ファイルを読み込んでセッション状態に保存
-                with open(output_file, "rb") as f:
-                    audio_bytes = f.read()
-                
-                st.session_state.tts_output_file = output_file
-                st.session_state.tts_audio_bytes = audio_bytes
+                # 音声データとダウンロード時のファイル名をセッション状態に保存
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                st.session_state.tts_output_file = f"tts_output_{timestamp}.{format}"
+                st.session_state.tts_audio_bytes = audio_buffer.getvalue()
                 st.session_state.tts_format = format
                 
                 # 選択されたモデル情報を保存
                 if selected_model_id:
                     st.session_state.last_model_id = selected_model_id
-                    # モデル名から検索（JSONから読み込んだリストを使用）
-                    selected_name = None
-                    for name, mid in models_dict_from_json.items():
-                        if mid == selected_model_id:
-                            selected_name = name
-                            break
+                    # モデル名を逆引き（JSONから読み込んだリストを使用）
+                    selected_name = id_to_name.get(selected_model_id)
+                    if not selected_name and selected_model_name and selected_model_name != "デフォルト音声（モデルID未指定）":
+                        selected_name = selected_model_name
                     if selected_name:
                         st.session_state.last_model_name = selected_name
-                        # JSONファイルの最後に使用したモデルを更新
+                        # JSONファイルの最後に使用したモデルを更新（1回の生成で1回だけ書き込む）
                         json_data = load_models_from_json()
                         json_data["last_used"] = {"name": selected_name, "id": selected_model_id}
                         save_models_to_json(json_data)
-                    elif selected_model_name and selected_model_name != "デフォルト音声（モデルID未指定）":
-                        st.session_state.last_model_name = selected_model_name
-                        json_data = load_models_from_json()
-                        json_data["last_used"] = {"name": selected_model_name, "id": selected_model_id}
-                        save_models_to_json(json_data)
+                
+                # 消費したクレジットが次の取得で反映されるようにする
+                get_credit_cached.clear()
                 
                 st.success("✅ 音声の生成が完了しました！")
-                st.rerun()
                 
             except Exception as e:
                 st.error(f"❌ エラーが発生しました: {e}")
                 st.session_state.tts_output_file = None
                 st.session_state.tts_audio_bytes = None
-                import traceback
-                with st.expander("詳細なエラー情報"):
-                    st.code(traceback.format_exc())
+                show_error_details(e)
     
     # フォームの外で結果を表示（ダウンロードボタンを含む）
     if st.session_state.tts_output_file and st.session_state.tts_audio_bytes:
         st.markdown("---")
         st.subheader("🎵 生成された音声")
         
-        st.audio(st.session_state.tts_audio_bytes, format=f"audio/{st.session_state.tts_format}")
+        mime = FORMAT_MIME[st.session_state.tts_format]
+        if st.session_state.tts_format == "pcm":
+            # ヘッダーのないPCMはブラウザで再生できないため、再生用にのみWAVヘッダーを付ける
+            st.audio(pcm_to_wav(st.session_state.tts_audio_bytes), format=FORMAT_MIME["wav"])
+        else:
+            st.audio(st.session_state.tts_audio_bytes, format=mime)
         
         # ダウンロードボタン（フォームの外なので使用可能）
         st.download_button(
             label="📥 音声ファイルをダウンロード",
             data=st.session_state.tts_audio_bytes,
             file_name=Path(st.session_state.tts_output_file).name,
-            mime=f"audio/{st.session_state.tts_format}",
+            mime=mime,
             use_container_width=True
         )
 
 def main():
     """メイン関数"""
     init_session_state()
+    if WHISPER_AVAILABLE:
+        start_whisper_preload(st.session_state.whisper_model_size)
     sidebar()
     
     # タブで機能を分割
@@ -7,7 +7,10 @@ model_id.txtへの保存処理は削除され、models.jsonでの管理に統一
 """
 
 from fish_audio_sdk import Session
+import asyncio
+import contextlib
 import os
+import subprocess
 from pathlib import Path
 
 # .envファイルがあれば読み込む
@@ -18,13 +21,51 @@ try:
 except ImportError:
     pass  # python-dotenvがインストールされていない場合はスキップ
 
+# 圧縮の対象とする非圧縮・可逆圧縮の音声形式
+LOSSLESS_SUFFIXES = (".wav", ".flac")
+
+
+def compress_to_opus(audio_file_path: str, bitrate: str = "32k") -> bytes:
+    """
+    ffmpegで音声をOpus（48kHzモノラル、Oggコンテナ）に変換します。
+    
+    Parameters:
+    -----------
+    audio_file_path : str
+        変換する音声ファイルのパス
+    bitrate : str
+        Opusのビットレート
+    
+    Returns:
+    --------
+    data : bytes
+        変換後の音声データ（ffmpegがない、または変換に失敗した場合はNone）
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-i", audio_file_path,
+                "-c:a", "libopus", "-b:a", bitrate, "-ac", "1", "-ar", "48000",
+                "-f", "ogg", "pipe:1"
+            ],
+            capture_output=True,
+            check=True
+        )
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        return None
+    return result.stdout
+
+
 def create_voice_clone_model(
     api_key: str,
     audio_file_path: str,
     model_title: str = "My Custom Voice",
     model_description: str = "Voice cloned from sample audio",
     transcription: str = "",
-    visibility: str = "private"
+    visibility: str = "private",
+    compress: bool = False,
+    voice_data: bytes = None
 ):
     """
     音声ファイルから音声クローンモデルを作成します。
@@ -43,6 +84,10 @@ def create_voice_clone_model(
         音声ファイルの文字起こし（推奨）
     visibility : str
         モデルの公開設定 ("private", "public", "unlist")
+    compress : bool
+        WAV・FLACをOpusに圧縮してから送信するか（ffmpegが必要。失敗時は元の音声を送信）
+    voice_data : bytes
+        送信する音声データ（圧縮済みのデータなど。指定した場合はファイルの代わりに送信）
     
     Returns:
     --------
@@ -59,21 +104,30 @@ def create_voice_clone_model(
     
     print(f"音声ファイルを読み込んでいます: {audio_file_path}")
     
-    # 音声データの読み込み
-    with open(audio_file_path, "rb") as f:
-        audio_data = f.read()
-    
-    print("音声クローンモデルを作成中...")
-    
-    # モデルの作成
-    model = session.create_model(
-        title=model_title,
-        description=model_description,
-        voices=[audio_data],  # 複数のサンプルを指定可能
-        texts=[transcription] if transcription else [""],
-        visibility=visibility,
-        enhance_audio_quality=True  # 音質向上オプション
-    )
+    # 送信量を減らすため、非圧縮の音声はOpusに変換する
+    if voice_data is None and compress and Path(audio_file_path).suffix.lower() in LOSSLESS_SUFFIXES:
+        voice_data = compress_to_opus(audio_file_path)
+        if voice_data is None:
+            print("Opusへの圧縮に失敗したため、元の音声ファイルをそのまま送信します。")
+    
+    # 音声データの読み込み（ファイルオブジェクトのまま渡し、ファイル全体をbytesにコピーせずに送信する）
+    # （送信するデータが用意されている場合はファイルを開かない）
+    with contextlib.ExitStack() as stack:
+        audio_data = voice_data
+        if audio_data is None:
+            audio_data = stack.enter_context(open(audio_file_path, "rb"))
+        
+        print("音声クローンモデルを作成中...")
+        
+        # モデルの作成
+        model = session.create_model(
+            title=model_title,
+            description=model_description,
+            voices=[audio_data],  # 複数のサンプルを指定可能
+            texts=[transcription] if transcription else [""],
+            visibility=visibility,
+            enhance_audio_quality=True  # 音質向上オプション
+        )
     
     print(f"\n✓ モデルの作成が完了しました！")
     print(f"モデルID: {model.id}")
@@ -85,6 +139,21 @@ def create_voice_clone_model(
     return model.id
 
 
+async def create_voice_clone_model_async(**kwargs):
+    """
+    create_voice_clone_modelを別スレッドで実行します。
+    
+    アップロードとモデル作成の待ち時間中も、呼び出し側のイベントループで
+    進捗表示などの処理を続けられます。引数はcreate_voice_clone_modelと同じです。
+    
+    Returns:
+    --------
+    model_id : str
+        作成されたモデルのID
+    """
+    return await asyncio.to_thread(create_voice_clone_model, **kwargs)
+
+
 def list_existing_models(api_key: str):
     """
     既存の音声モデルをリスト表示します。
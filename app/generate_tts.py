@@ -8,9 +8,13 @@ model_id.txtへの依存を削除し、models.jsonでの管理に統一されて
 
 from fish_audio_sdk import Session, TTSRequest, Prosody
 from fish_audio_sdk.exceptions import HttpCodeErr
+import functools
 import os
+import queue
+import threading
 from datetime import datetime
 from pathlib import Path
+from typing import BinaryIO
 import json
 
 # .envファイルがあれば読み込む
@@ -21,28 +25,85 @@ try:
 except ImportError:
     pass  # python-dotenvがインストールされていない場合はスキップ
 
-def generate_tts(
-    api_key: str,
+@functools.lru_cache(maxsize=4)
+def get_session(api_key: str) -> Session:
+    """
+    APIキーごとにSessionを使い回します。
+    
+    呼び出しのたびにSessionを作成すると接続プールが作り直され、
+    毎回TCP/TLSのハンドシェイクが発生するため、モジュール全体で共有します。
+    
+    Parameters:
+    -----------
+    api_key : str
+        Fish AudioのAPIキー
+    
+    Returns:
+    --------
+    session : Session
+        APIキーに対応するSession
+    """
+    return Session(api_key)
+
+
+def write_chunks_in_background(chunks, output_file: str):
+    """
+    受信したチャンクを別スレッドでファイルに書き込みます。
+    
+    ネットワークからの受信とディスクへの書き込みを並行させ、
+    書き込み待ちで受信が止まらないようにします。
+    
+    Parameters:
+    -----------
+    chunks : Iterable[bytes]
+        書き込むデータのチャンク
+    output_file : str
+        出力ファイルのパス
+    """
+    chunk_queue = queue.Queue(maxsize=32)
+    errors = []
+    
+    def writer():
+        try:
+            # 大きめのバッファで小さなチャンクをまとめて書き込む
+            with open(output_file, "wb", buffering=1 << 20) as f:
+                while (chunk := chunk_queue.get()) is not None:
+                    f.write(chunk)
+        except Exception as e:
+            errors.append(e)
+            # 受信側がブロックしないよう、残りのチャンクは読み捨てる
+            while chunk_queue.get() is not None:
+                pass
+    
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+    try:
+        for chunk in chunks:
+            chunk_queue.put(chunk)
+    finally:
+        chunk_queue.put(None)
+        writer_thread.join()
+    
+    if errors:
+        raise errors[0]
+
+
+def build_tts_request(
     text: str,
     model_id: str = None,
-    output_file: str = None,
     format: str = "wav",
     speed: float = 1.0,
     volume: int = 0
-):
+) -> TTSRequest:
     """
-    テキストから音声を生成します。
+    TTSリクエストを作成します。
     
     Parameters:
     -----------
-    api_key : str
-        Fish AudioのAPIキー
     text : str
         音声に変換するテキスト
     model_id : str
         使用する音声モデルのID（Noneの場合はデフォルト音声）
-    output_file : str
-        出力ファイル名（Noneの場合は自動生成）
     format : str
         出力フォーマット ("mp3", "wav", "opus", "pcm")
     speed : float
@@ -52,25 +113,9 @@ def generate_tts(
     
     Returns:
     --------
-    output_file : str
-        生成された音声ファイルのパス
+    request : TTSRequest
+        Fish Audioに送信するリクエスト
     """
-    
-    # セッションの作成
-    session = Session(api_key)
-    
-    # 出力ファイル名の生成
-    if output_file is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_dir = os.path.join(os.path.dirname(__file__), "..", "output")
-        os.makedirs(output_dir, exist_ok=True)
-        output_file = os.path.join(output_dir, f"tts_output_{timestamp}.{format}")
-    else:
-        output_dir = os.path.join(os.path.dirname(__file__), "..", "output")
-        os.makedirs(output_dir, exist_ok=True)
-        output_file = os.path.join(output_dir, output_file)
-    
-    # TTSリクエストの作成
     request_params = {
         "text": text,
         "format": format,
@@ -93,13 +138,94 @@ def generate_tts(
     elif format == "pcm":
         request_params["sample_rate"] = 44100
     
-    request = TTSRequest(**request_params)
+    return TTSRequest(**request_params)
+
+
+def iter_tts(
+    api_key: str,
+    text: str,
+    model_id: str = None,
+    format: str = "wav",
+    speed: float = 1.0,
+    volume: int = 0
+):
+    """
+    テキストから音声を生成し、受信したチャンクを順に返します。
+    
+    生成の完了を待たずに、最初のチャンクが届いた時点から処理できます。
+    引数はgenerate_ttsと同じです。
+    
+    Returns:
+    --------
+    chunks : Iterator[bytes]
+        音声データのチャンク
+    """
+    session = get_session(api_key)
+    yield from session.tts(build_tts_request(text, model_id, format, speed, volume))
+
+
+def generate_tts(
+    api_key: str,
+    text: str,
+    model_id: str = None,
+    output_file: str = None,
+    format: str = "wav",
+    speed: float = 1.0,
+    volume: int = 0,
+    sink: BinaryIO = None
+):
+    """
+    テキストから音声を生成します。
+    
+    Parameters:
+    -----------
+    api_key : str
+        Fish AudioのAPIキー
+    text : str
+        音声に変換するテキスト
+    model_id : str
+        使用する音声モデルのID（Noneの場合はデフォルト音声）
+    output_file : str
+        出力ファイル名（Noneの場合は自動生成）
+    format : str
+        出力フォーマット ("mp3", "wav", "opus", "pcm")
+    speed : float
+        話速（0.5-2.0、デフォルト1.0）
+    volume : int
+        音量調整（-20~20、デフォルト0）
+    sink : BinaryIO
+        書き込み先のバイナリストリーム（io.BytesIOなど）。
+        指定した場合はファイルに保存せず、受信したチャンクをそのまま書き込む
+    
+    Returns:
+    --------
+    output_file : str or BinaryIO
+        生成された音声ファイルのパス（sinkを指定した場合はsink）
+    """
+    
+    # セッションの取得（APIキーごとに再利用）
+    session = get_session(api_key)
+    
+    # 出力ファイル名の生成（sinkを指定した場合はファイルを作らない）
+    if sink is None:
+        output_dir = os.path.join(os.path.dirname(__file__), "..", "output")
+        os.makedirs(output_dir, exist_ok=True)
+        if output_file is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_file = f"tts_output_{timestamp}.{format}"
+        output_file = os.path.join(output_dir, output_file)
+    
+    # TTSリクエストの作成
+    request = build_tts_request(text, model_id, format, speed, volume)
     
     # 音声の生成と保存
     try:
-        with open(output_file, "wb") as f:
+        if sink is not None:
             for chunk in session.tts(request):
-                f.write(chunk)
+                sink.write(chunk)
+            return sink
+        
+        write_chunks_in_background(session.tts(request), output_file)
         
         return output_file
         
@@ -156,7 +282,7 @@ def check_api_credit(api_key: str):
         Fish AudioのAPIキー
     """
     try:
-        session = Session(api_key)
+        session = get_session(api_key)
         credit = session.get_api_credit()
         print(f"APIクレジット残高: {credit.credit}")
     except Exception as e:
@@ -3,38 +3,225 @@ import numpy as np
 import queue
 import threading
 import time
-import whisper
-import torch
-import wave
-import io
-import tempfile
 import os
+import functools
+import torch
+
+# faster-whisper（CTranslate2）を優先し、未インストールの場合はopenai-whisperを使用
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    import whisper
+    FASTER_WHISPER_AVAILABLE = False
+
+# CPU実行時はwhisper.cpp（量子化済みGGMLモデル）が使えればそちらを使用
+try:
+    from pywhispercpp.model import Model as WhisperCppModel
+    WHISPERCPP_AVAILABLE = True
+except ImportError:
+    WHISPERCPP_AVAILABLE = False
+
+# Numbaがあれば音声レベルの計算を中間配列なしの1パスのループにJITコンパイルする
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True, fastmath=True)
+    def mean_abs(x):
+        """音声ブロックの平均絶対振幅"""
+        s = 0.0
+        for i in range(x.shape[0]):
+            s += abs(x[i])
+        return s / x.shape[0]
+else:
+    def mean_abs(x):
+        """音声ブロックの平均絶対振幅"""
+        return np.abs(x).mean()
+
+def get_whisper_device():
+    """
+    Whisperを実行するデバイスを決める
+    
+    環境変数 WHISPER_DEVICE で "cuda:1" のように指定すると、Demucsなど
+    他のGPU処理とは別のGPUにWhisperを配置できる。
+    """
+    default = "cuda" if torch.cuda.is_available() else "cpu"
+    return os.environ.get("WHISPER_DEVICE", default)
+
+def get_backend(device):
+    """デバイスとインストール状況から使用するWhisperバックエンドを決める"""
+    if device == "cpu" and WHISPERCPP_AVAILABLE:
+        return "whisper.cpp"
+    if FASTER_WHISPER_AVAILABLE:
+        return "faster-whisper"
+    return "openai-whisper"
+
+@functools.lru_cache(maxsize=4)
+def load_whisper_model(name, device):
+    """Whisperモデルを読み込む（バックエンドはget_backendで選択、同じ引数では再利用）"""
+    backend = get_backend(device)
+    is_cuda = device.startswith("cuda")
+    if backend == "whisper.cpp":
+        # Q5_1量子化モデル（初回は自動でダウンロードされる）
+        return WhisperCppModel(f"{name}-q5_1", n_threads=os.cpu_count(), print_progress=False, print_realtime=False)
+    if backend == "faster-whisper":
+        compute_type = "int8_float16" if is_cuda else "int8"
+        device_type, _, device_index = device.partition(":")
+        return WhisperModel(name, device=device_type, device_index=int(device_index or 0), compute_type=compute_type)
+    model = whisper.load_model(name, device=device)
+    # 推論専用のため勾配計算を無効化する
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad_(False)
+    # CUDAでは固定形状(MAX_BATCH, n_mels, 3000)のエンコーダをコンパイルし、起動時にウォームアップする
+    # （triton がない環境などでコンパイルに失敗した場合は、通常の実行に戻す）
+    if is_cuda and hasattr(torch, "compile"):
+        eager_encoder = model.encoder
+        try:
+            model.encoder = torch.compile(eager_encoder, mode="reduce-overhead", fullgraph=True)
+            dummy_mel = torch.zeros(MAX_BATCH, model.dims.n_mels, whisper.audio.N_FRAMES, device=device, dtype=torch.float16)
+            with torch.inference_mode():
+                model.encoder(dummy_mel)
+        except Exception as e:
+            print(f"エンコーダのコンパイルに失敗したため、通常の実行に切り替えます: {e}")
+            model.encoder = eager_encoder
+    return model
+
+@functools.lru_cache(maxsize=4)
+def mel_constants(device, n_mels):
+    """Hann窓とメルフィルタバンクをデバイスごとに一度だけ作成する"""
+    window = torch.hann_window(whisper.audio.N_FFT, device=device)
+    filters = whisper.audio.mel_filters(device, n_mels)
+    return window, filters
+
+def log_mel_spectrogram(audio, n_mels):
+    """whisper.log_mel_spectrogramと同じ計算（Hann窓を毎回作り直さずキャッシュを使う）"""
+    window, filters = mel_constants(audio.device, n_mels)
+    stft = torch.stft(audio, whisper.audio.N_FFT, whisper.audio.HOP_LENGTH, window=window, return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    log_spec = torch.clamp(filters @ magnitudes, min=1e-10).log10()
+    log_spec = torch.maximum(log_spec, log_spec.max() - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+@functools.lru_cache(maxsize=1)
+def pinned_staging_buffer():
+    """GPU転送用のページロックバッファ(MAX_BATCH, 30秒分)を一度だけ確保する"""
+    return torch.zeros(MAX_BATCH, whisper.audio.N_SAMPLES, dtype=torch.float32).pin_memory()
+
+def transcribe_batch(model, audios, device):
+    """float32のNumPy配列のリストをまとめて文字起こしする"""
+    audios = [audio.astype(np.float32, copy=False) for audio in audios]
+    backend = get_backend(device)
+    if backend == "whisper.cpp":
+        return ["".join(seg.text for seg in model.transcribe(audio, language="ja")).strip() for audio in audios]
+    if backend == "faster-whisper":
+        texts = []
+        for audio in audios:
+            segments, _ = model.transcribe(audio, language="ja", beam_size=1, vad_filter=False)
+            texts.append("".join(seg.text for seg in segments).strip())
+        return texts
+    # メルスペクトログラムをモデルと同じデバイス上で計算し、30秒窓に揃えて(B, n_mels, 3000)で一括デコードする
+    # （発話は30秒以内を想定。CUDAではFP16でエンコーダの帯域を半減させる）
+    is_cuda = device.startswith("cuda")
+    if is_cuda:
+        # 使い回しのページロックバッファに詰めてから、バッチ全体を1回の転送でGPUへ送る
+        staging = pinned_staging_buffer()
+        for i, audio in enumerate(audios):
+            n = min(len(audio), whisper.audio.N_SAMPLES)
+            staging[i, :n] = torch.from_numpy(audio[:n])
+            staging[i, n:] = 0.0
+        audio_batch = staging[:len(audios)].to(model.device, non_blocking=True)
+    else:
+        audio_batch = [torch.from_numpy(audio) for audio in audios]
+    mels = []
+    for audio_tensor in audio_batch:
+        # メル変換後に0で埋めると無音にならないため、transcribeと同様に音声の段階で30秒に揃える
+        audio_tensor = whisper.pad_or_trim(audio_tensor, whisper.audio.N_SAMPLES)
+        mels.append(log_mel_spectrogram(audio_tensor, model.dims.n_mels))
+    mel_batch = torch.stack(mels)
+    options = whisper.DecodingOptions(language="ja", fp16=is_cuda)
+    with torch.inference_mode():
+        if hasattr(model.encoder, "_orig_mod"):
+            # コンパイル済みエンコーダはバッチ数が変わると再コンパイルされるため、
+            # 常にMAX_BATCH件に埋めて実行し、実際の件数分の特徴量だけをデコーダに渡す
+            padding = mel_batch.new_zeros(MAX_BATCH - len(mels), *mel_batch.shape[1:])
+            mel_batch = model.encoder(torch.cat([mel_batch, padding]).half())[:len(mels)]
+        results = whisper.decode(model, mel_batch, options)
+    return [result.text.strip() for result in results]
+
+# 認識待ちの発話をまとめて処理する際の最大数と待ち時間（秒）
+MAX_BATCH = 8
+BATCH_WINDOW = 0.02
+
+# 終了時に認識ワーカーの完了を待つ最大時間（秒）
+WORKER_JOIN_TIMEOUT = 10.0
+
+def put_latest(q, item):
+    """キューが満杯なら最も古い要素を捨てて追加する（待ち時間の上限を保つ）"""
+    try:
+        q.put_nowait(item)
+    except queue.Full:
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            pass
+        q.put_nowait(item)
+
+# Silero VADの1フレーム（16kHzで32ms）
+VAD_FRAME = 512
+
+def load_vad():
+    """Silero VADを読み込む（取得できない場合はNoneを返し、振幅閾値で判定する）"""
+    try:
+        vad_model, _ = torch.hub.load("snakers4/silero-vad", "silero_vad", trust_repo=True)
+        return vad_model
+    except Exception as e:
+        print(f"Silero VADの読み込みに失敗しました（振幅閾値で判定します）: {e}")
+        return None
 
 def main():
+    device = get_whisper_device()
+    print(f"使用デバイス: {device}")
+    
     # Whisperモデルの読み込み
     print("Whisperモデルを読み込んでいます...")
-    model = whisper.load_model("base")  # モデルサイズ: tiny, base, small, medium, large
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    print(f"使用デバイス: {device}")
+    model = load_whisper_model("base", device)  # モデルサイズ: tiny, base, small, medium, large
+    print(f"使用バックエンド: {get_backend(device)}")
+    
+    # 音声区間検出（VAD）モデルの読み込み
+    vad_model = load_vad()
     
     # オーディオ設定
     samplerate = 16000  # Whisperの推奨サンプルレート
     channels = 1
-    blocksize = 1600  # 0.1秒分
-    q = queue.Queue()
+    blocksize = VAD_FRAME * 3  # 約0.1秒分（VADフレーム3つ）
+    q = queue.Queue(maxsize=50)  # 約5秒分。処理が追いつかない場合は古いブロックから破棄する
+    speech_q = queue.Queue(maxsize=4)  # 認識待ちの発話（Whisperワーカーへ渡す）
     
     # 音声検出のパラメータ
-    THRESHOLD = 0.005  # 閾値を下げる
+    VAD_THRESHOLD = 0.5  # Silero VADの発話確率の閾値
+    THRESHOLD = 0.005  # 閾値を下げる（VADが使えない場合の振幅閾値）
     SILENCE_THRESHOLD = 0.003
     SILENCE_DURATION = 1.0
     MIN_SPEECH_DURATION = 0.3
     
+    # 音声処理中にJITコンパイルが走らないよう、起動時に一度呼び出しておく
+    mean_abs(np.zeros(blocksize, dtype=np.float32))
+    
     # 音声認識の状態管理
     is_speaking = False
     speech_start_time = 0
     last_speech_time = 0
     current_text = ""
-    audio_buffer = []
+    # 発話バッファ（Whisperの最大窓である30秒分を事前確保し、書き込み位置で管理）
+    audio_buffer = np.empty(samplerate * 30, dtype=np.float32)
+    write_ptr = 0
+    # int16ブロックをfloat32に変換する作業用バッファ（ブロックごとに再利用）
+    frame_buffer = np.empty(blocksize, dtype=np.float32)
     
     # 利用可能なデバイスを表示
     print("利用可能なマイクデバイス:")
@@ -49,97 +236,130 @@ def main():
     def audio_callback(indata, frames, time, status):
         if status:
             print(f"ステータス: {status}")
-        q.put(indata.copy())
+        put_latest(q, bytes(indata))  # int16の生データをそのままコピー
     
-    def save_audio_to_wav(audio_data, filename):
-        """音声データをWAVファイルとして保存"""
-        with wave.open(filename, 'wb') as wf:
-            wf.setnchannels(channels)
-            wf.setsampwidth(2)  # 16-bit
-            wf.setframerate(samplerate)
-            wf.writeframes((audio_data * 32767).astype(np.int16).tobytes())
+    def transcribe_worker():
+        """認識待ちの発話を取り出してWhisperで文字起こしする（専用スレッドで実行）"""
+        nonlocal current_text
+        
+        running = True
+        while running:
+            combined_audio = speech_q.get()
+            if combined_audio is None:
+                break
+            
+            # 短い待ち時間の間に溜まった発話をまとめて1回の推論で処理する
+            batch = [combined_audio]
+            deadline = time.monotonic() + BATCH_WINDOW
+            while len(batch) < MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = speech_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if pending is None:
+                    running = False
+                    break
+                batch.append(pending)
+            
+            try:
+                # Whisperで音声認識（一時WAVファイルを経由せず配列を直接渡す）
+                print(f"音声認識を実行中...（{len(batch)}件）")
+                texts = transcribe_batch(model, [audio.ravel() for audio in batch], device)
+                
+                for text in texts:
+                    print(f"認識結果（生）: {text}")
+                    
+                    # 文脈に基づく認識結果の更新
+                    if current_text:
+                        if text.startswith(current_text):
+                            new_text = text[len(current_text):]
+                            current_text = text
+                            print(f"\n認識結果（追加）: {new_text}")
+                        else:
+                            current_text = text
+                            print(f"\n認識結果（更新）: {text}")
+                    else:
+                        current_text = text
+                        print(f"\n認識結果: {text}")
+                
+            except Exception as e:
+                print(f"\n音声認識エラー: {e}")
+                import traceback
+                traceback.print_exc()
     
     def process_audio(audio_data):
-        nonlocal is_speaking, speech_start_time, last_speech_time, current_text, audio_buffer
+        nonlocal is_speaking, speech_start_time, last_speech_time, write_ptr
         
         current_time = time.time()
-        audio_level = np.abs(audio_data).mean()
+        audio_level = mean_abs(audio_data.ravel())
         
         # 音声レベルの表示（デバッグ用）
         print(f"\r現在の音声レベル: {audio_level:.4f}", end="")
         
-        if audio_level > THRESHOLD:
+        # VADフレームごとの発話確率の最大値で判定（ノイズによる誤検出を防ぐ）
+        if vad_model is not None:
+            frames = torch.from_numpy(audio_data.reshape(-1, VAD_FRAME))
+            with torch.inference_mode():
+                speech_prob = max(vad_model(frame, samplerate).item() for frame in frames)
+            is_voice = speech_prob > VAD_THRESHOLD
+        else:
+            is_voice = audio_level > THRESHOLD
+        
+        if is_voice:
             if not is_speaking:
                 is_speaking = True
                 speech_start_time = current_time
-                audio_buffer = []
+                write_ptr = 0
                 print("\n音声入力を検出しました...")
             
             last_speech_time = current_time
-            audio_buffer.append(audio_data)
+            samples = audio_data.ravel()
+            while len(samples):
+                n = min(len(samples), len(audio_buffer) - write_ptr)
+                audio_buffer[write_ptr:write_ptr + n] = samples[:n]
+                write_ptr += n
+                samples = samples[n:]
+                if write_ptr == len(audio_buffer):
+                    # 30秒（Whisperの窓）に達したら、発話の途中でもここまでを認識に回して続きを書き込む
+                    print("\n発話が30秒に達したため、ここまでを認識します。")
+                    put_latest(speech_q, audio_buffer.copy())
+                    write_ptr = 0
+                    speech_start_time = current_time
             
         elif is_speaking and (current_time - last_speech_time) > SILENCE_DURATION:
             if (current_time - speech_start_time) >= MIN_SPEECH_DURATION:
-                # 音声認識の実行
-                combined_audio = np.concatenate(audio_buffer)
+                # 音声認識はワーカースレッドで実行（VAD処理をブロックしない）
+                # バッファは次の発話で再利用するため、渡す分だけコピーする
+                combined_audio = audio_buffer[:write_ptr].copy()
                 
                 # デバッグ情報
                 print(f"\n音声データの長さ: {len(combined_audio)} サンプル")
                 print(f"音声データの形状: {combined_audio.shape}")
                 print(f"音声データの最大値: {np.max(np.abs(combined_audio))}")
                 
-                try:
-                    # 一時ファイルに音声を保存
-                    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                        temp_filename = temp_file.name
-                    
-                    save_audio_to_wav(combined_audio, temp_filename)
-                    print(f"音声ファイルを保存しました: {temp_filename}")
-                    
-                    # Whisperで音声認識
-                    print("音声認識を実行中...")
-                    result = model.transcribe(
-                        temp_filename,
-                        language="ja",
-                        task="transcribe",
-                        fp16=False
-                    )
-                    
-                    # 一時ファイルを削除
-                    os.unlink(temp_filename)
-                    
-                    text = result["text"].strip()
-                    print(f"認識結果（生）: {text}")
-                    
-                    # 文脈に基づく認識結果の更新
-                    if current_text:
-                        if text.startswith(current_text):
-                            new_text = text[len(current_text):]
-                            current_text = text
-                            print(f"\n認識結果（追加）: {new_text}")
-                        else:
-                            current_text = text
-                            print(f"\n認識結果（更新）: {text}")
-                    else:
-                        current_text = text
-                        print(f"\n認識結果: {text}")
-                    
-                except Exception as e:
-                    print(f"\n音声認識エラー: {e}")
-                    import traceback
-                    traceback.print_exc()
+                # 認識待ちが溜まっている場合は最も古い発話を捨て、最新の発話を優先する
+                if speech_q.full():
+                    print("\n認識待ちの発話が多いため、古い発話をスキップしました。")
+                put_latest(speech_q, combined_audio)
             
             is_speaking = False
-            audio_buffer = []
+            write_ptr = 0
+    
+    worker = threading.Thread(target=transcribe_worker, daemon=True)
+    worker.start()
     
     try:
         # マイクストリームを開始
-        stream = sd.InputStream(
+        # デバイスのネイティブ形式に近いint16で取得し、float32への変換は処理スレッドで行う
+        stream = sd.RawInputStream(
             samplerate=samplerate,
             channels=channels,
             callback=audio_callback,
             blocksize=blocksize,
-            dtype=np.float32
+            dtype='int16'
         )
         
         with stream:
@@ -150,7 +370,10 @@ def main():
             
             while True:
                 try:
-                    audio_data = q.get()
+                    raw = q.get()
+                    audio_data = frame_buffer[:len(raw) // 2]
+                    audio_data[:] = np.frombuffer(raw, dtype=np.int16)
+                    audio_data *= 1.0 / 32768.0
                     process_audio(audio_data)
                     
                 except KeyboardInterrupt:
@@ -164,6 +387,11 @@ def main():
     except Exception as e:
         print(f"マイクの初期化エラー: {e}")
         print("マイクが正しく接続されているか確認してください。")
+    finally:
+        # キューが満杯でもブロックしないよう最も古い発話と入れ替えて終了を伝え、
+        # 残りの認識結果が表示されるまで一定時間だけ待つ
+        put_latest(speech_q, None)
+        worker.join(timeout=WORKER_JOIN_TIMEOUT)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
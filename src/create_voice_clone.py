@@ -6,7 +6,9 @@ Fish Audio 音声クローンモデル作成スクリプト
 """
 
 from fish_audio_sdk import Session
+import contextlib
 import os
+import subprocess
 from pathlib import Path
 
 # .envファイルがあれば読み込む
@@ -17,13 +19,50 @@ try:
 except ImportError:
     pass  # python-dotenvがインストールされていない場合はスキップ
 
+# 圧縮の対象とする非圧縮・可逆圧縮の音声形式
+LOSSLESS_SUFFIXES = (".wav", ".flac")
+
+
+def compress_to_opus(audio_file_path: str, bitrate: str = "32k") -> bytes:
+    """
+    ffmpegで音声をOpus（48kHzモノラル、Oggコンテナ）に変換します。
+    
+    Parameters:
+    -----------
+    audio_file_path : str
+        変換する音声ファイルのパス
+    bitrate : str
+        Opusのビットレート
+    
+    Returns:
+    --------
+    data : bytes
+        変換後の音声データ（ffmpegがない、または変換に失敗した場合はNone）
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-i", audio_file_path,
+                "-c:a", "libopus", "-b:a", bitrate, "-ac", "1", "-ar", "48000",
+                "-f", "ogg", "pipe:1"
+            ],
+            capture_output=True,
+            check=True
+        )
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        return None
+    return result.stdout
+
+
 def create_voice_clone_model(
     api_key: str,
     audio_file_path: str = "../examples/sample_voice.wav",
     model_title: str = "My Custom Voice",
     model_description: str = "Voice cloned from sample audio",
     transcription: str = "",
-    visibility: str = "private"
+    visibility: str = "private",
+    compress: bool = False
 ):
     """
     音声ファイルから音声クローンモデルを作成します。
@@ -42,6 +81,8 @@ def create_voice_clone_model(
         音声ファイルの文字起こし（推奨）
     visibility : str
         モデルの公開設定 ("private", "public", "unlist")
+    compress : bool
+        WAV・FLACをOpusに圧縮してから送信するか（ffmpegが必要。失敗時は元の音声を送信）
     
     Returns:
     --------
@@ -58,21 +99,31 @@ def create_voice_clone_model(
     
     print(f"音声ファイルを読み込んでいます: {audio_file_path}")
     
-    # 音声データの読み込み
-    with open(audio_file_path, "rb") as f:
-        audio_data = f.read()
-    
-    print("音声クローンモデルを作成中...")
-    
-    # モデルの作成
-    model = session.create_model(
-        title=model_title,
-        description=model_description,
-        voices=[audio_data],  # 複数のサンプルを指定可能
-        texts=[transcription] if transcription else [""],
-        visibility=visibility,
-        enhance_audio_quality=True  # 音質向上オプション
-    )
+    # 送信量を減らすため、非圧縮の音声はOpusに変換する
+    compressed = None
+    if compress and Path(audio_file_path).suffix.lower() in LOSSLESS_SUFFIXES:
+        compressed = compress_to_opus(audio_file_path)
+        if compressed is None:
+            print("Opusへの圧縮に失敗したため、元の音声ファイルをそのまま送信します。")
+    
+    # 音声データの読み込み（ファイルオブジェクトのまま渡し、ファイル全体をbytesにコピーせずに送信する）
+    # （送信するデータが用意されている場合はファイルを開かない）
+    with contextlib.ExitStack() as stack:
+        audio_data = compressed
+        if audio_data is None:
+            audio_data = stack.enter_context(open(audio_file_path, "rb"))
+        
+        print("音声クローンモデルを作成中...")
+        
+        # モデルの作成
+        model = session.create_model(
+            title=model_title,
+            description=model_description,
+            voices=[audio_data],  # 複数のサンプルを指定可能
+            texts=[transcription] if transcription else [""],
+            visibility=visibility,
+            enhance_audio_quality=True  # 音質向上オプション
+        )
     
     print(f"\n✓ モデルの作成が完了しました！")
     print(f"モデルID: {model.id}")
@@ -5,11 +5,12 @@
 - youtube_downloader: YouTubeから音声ダウンロード
 """
 
-from .audio_separation import separate_vocals, separate_vocals_full
+from .audio_separation import separate_vocals, separate_vocals_full, separate_with_server
 from .youtube_downloader import download_youtube_as_wav
 
 __all__ = [
     'separate_vocals',
     'separate_vocals_full',
+    'separate_with_server',
     'download_youtube_as_wav',
 ]
@@ -8,11 +8,142 @@ Fish Audio の音声クローンに最適な音声を準備できます。
     pip install demucs
 """
 
-import subprocess
+import functools
+import secrets
 import sys
 import os
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
 from pathlib import Path
 
+# 常駐サーバー（--serve）の待ち受けアドレスと認証キーの保存先
+SERVER_ADDRESS = ('localhost', 6123)
+SERVER_AUTHKEY_PATH = Path.home() / '.persona_stamp' / 'demucs_authkey'
+
+
+def _get_server_authkey(create=False):
+    """
+    常駐サーバーの認証キーを取得
+    
+    multiprocessing.connection は受信データをunpickleするため、認証キーが漏れると
+    任意のコードを実行されます。キーはユーザーごとにランダム生成し、本人だけが
+    読めるファイルに保存します。
+    
+    Args:
+        create (bool): キーファイルがない場合に新しく生成するか
+    
+    Returns:
+        bytes: 認証キー
+    
+    Raises:
+        ConnectionRefusedError: create=False でキーファイルがない場合（サーバー未起動）
+    """
+    try:
+        return SERVER_AUTHKEY_PATH.read_bytes()
+    except FileNotFoundError:
+        if not create:
+            raise ConnectionRefusedError("分離サーバーの認証キーがありません（サーバー未起動）")
+    
+    SERVER_AUTHKEY_PATH.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    authkey = secrets.token_bytes(32)
+    fd = os.open(SERVER_AUTHKEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(authkey)
+    return authkey
+
+
+@functools.lru_cache(maxsize=4)
+def _get_demucs(model_name, device):
+    """
+    Demucsモデルを読み込み、プロセス内で使い回す
+    
+    Args:
+        model_name (str): 分離モデル名
+        device (str): 実行デバイス（'cuda' または 'cpu'）
+    
+    Returns:
+        torch.nn.Module: 評価モードのDemucsモデル
+    """
+    from demucs.pretrained import get_model
+    
+    model = get_model(model_name)
+    model.to(device)
+    model.eval()
+    return model
+
+
+def _get_device():
+    """
+    Demucsの実行デバイスを決める
+    
+    環境変数 DEMUCS_DEVICE で "cuda:1" のように指定できる
+    （Whisperなど他のGPU処理と別のGPUに配置する場合）
+    """
+    import torch
+    
+    default_device = "cuda" if torch.cuda.is_available() else "cpu"
+    return os.environ.get("DEMUCS_DEVICE", default_device)
+
+
+def _run_demucs(input_path, output_dir, model_name, two_stems=False):
+    """
+    Demucsをプロセス内で実行し、各パートをWAVとして保存
+    
+    CLIをsubprocessで呼び出すとPython起動・PyTorchのimport・モデル読み込みが
+    毎回発生するため、Python APIを直接呼び出してモデルをメモリ上に保持します。
+    
+    Args:
+        input_path (str): 入力音声ファイルパス
+        output_dir (str): 出力ディレクトリ
+        model_name (str): 分離モデル
+        two_stems (bool): Trueの場合はvocals/no_vocalsの2つのみ保存
+    
+    Returns:
+        Path: 分離結果の出力ディレクトリ
+    """
+    try:
+        import torch
+        from demucs.apply import apply_model
+        from demucs.audio import save_audio
+        from demucs.separate import load_track
+    except ImportError:
+        print("エラー: demucs が見つかりません")
+        print("以下のコマンドでインストールしてください:")
+        print("  pip install demucs")
+        sys.exit(1)
+    
+    device = _get_device()
+    model = _get_demucs(model_name, device)
+    
+    # 音声の読み込みと正規化（demucs CLIと同じ処理）
+    wav = load_track(Path(input_path), model.audio_channels, model.samplerate)
+    ref = wav.mean(0)
+    wav = (wav - ref.mean()) / ref.std()
+    
+    # CUDAでは畳み込み・Attentionを半精度で実行（BF16対応GPUではBF16、それ以外はFP16）
+    # STFT/iSTFTはautocastの対象外のためFP32のまま計算される
+    use_autocast = device.startswith("cuda")
+    amp_dtype = torch.bfloat16 if use_autocast and torch.cuda.is_bf16_supported() else torch.float16
+    
+    # shifts=0: ランダムシフトによる追加パスを行わない（高速化）
+    with torch.no_grad(), torch.autocast("cuda", dtype=amp_dtype, enabled=use_autocast):
+        sources = apply_model(model, wav[None], device=device, shifts=0, split=True, overlap=0.1)[0]
+    sources = sources.float() * ref.std() + ref.mean()
+    
+    output_path = Path(output_dir) / model_name / Path(input_path).stem
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    stems = dict(zip(model.sources, sources))
+    if two_stems:
+        vocals = stems.pop('vocals')
+        stems = {'vocals': vocals, 'no_vocals': sum(stems.values())}
+    
+    for name, source in stems.items():
+        save_audio(source.cpu(), str(output_path / f"{name}.wav"), samplerate=model.samplerate)
+    
+    return output_path
+
+
 def separate_vocals(input_path, output_dir=None, model='htdemucs'):
     """
     Demucsによる高精度音声分離
@@ -41,34 +172,11 @@ def separate_vocals(input_path, output_dir=None, model='htdemucs'):
     print(f"\n※初回実行時はモデルのダウンロードで数分かかります")
     print(f"=" * 60 + "\n")
     
-    # Demucsコマンドを実行
-    # -n: モデル名
-    # -o: 出力ディレクトリ
-    # --two-stems=vocals: ボーカルとその他の2つに分離（高速化）
-    cmd = [
-        'demucs',
-        '-n', model,
-        '-o', output_dir,
-        '--two-stems=vocals',  # vocalsとno_vocalsのみ出力（高速）
-        input_path
-    ]
-    
-    try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        print(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(f"エラー: {e}")
-        print(f"標準エラー: {e.stderr}")
-        sys.exit(1)
-    except FileNotFoundError:
-        print("エラー: demucs が見つかりません")
-        print("以下のコマンドでインストールしてください:")
-        print("  pip install demucs")
-        sys.exit(1)
+    # Demucsをプロセス内で実行
+    # two_stems: ボーカルとその他の2つに分離（vocalsとno_vocalsのみ出力）
+    output_path = _run_demucs(input_path, output_dir, model, two_stems=True)
     
     # 出力ファイルの場所を表示
-    input_name = Path(input_path).stem
-    output_path = Path(output_dir) / model / input_name
     vocals_path = output_path / "vocals.wav"
     
     print(f"\n" + "=" * 60)
@@ -108,27 +216,7 @@ def separate_vocals_full(input_path, output_dir=None, model='htdemucs'):
     print(f"※4stem分離（vocals/drums/bass/other）実行中...")
     print(f"=" * 60 + "\n")
     
-    cmd = [
-        'demucs',
-        '-n', model,
-        '-o', output_dir,
-        input_path
-    ]
-    
-    try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        print(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(f"エラー: {e}")
-        print(f"標準エラー: {e.stderr}")
-        sys.exit(1)
-    except FileNotFoundError:
-        print("エラー: demucs が見つかりません")
-        print("インストール: pip install demucs")
-        sys.exit(1)
-    
-    input_name = Path(input_path).stem
-    output_path = Path(output_dir) / model / input_name
+    output_path = _run_demucs(input_path, output_dir, model)
     
     print(f"\n" + "=" * 60)
     print(f"✓ 分離完了!")
@@ -148,13 +236,93 @@ def separate_vocals_full(input_path, output_dir=None, model='htdemucs'):
     }
 
 
+def serve(model='htdemucs', address=SERVER_ADDRESS):
+    """
+    Demucsモデルを常駐させ、クライアントからの分離リクエストを順に処理
+    
+    ファイルごとにスクリプトを起動するとモデル読み込み（数秒）が毎回発生するため、
+    モデルをメモリ上に保持したまま待ち受けます。
+    
+    Args:
+        model (str): 起動時に読み込んでおく分離モデル
+        address (tuple): 待ち受けアドレス
+    """
+    print(f"Demucsモデルを読み込んでいます: {model}")
+    _get_demucs(model, _get_device())
+    
+    with Listener(address, authkey=_get_server_authkey(create=True)) as listener:
+        print(f"分離サーバーを起動しました: {address[0]}:{address[1]}（Ctrl+Cで終了）")
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError, EOFError) as e:
+                # 認証に失敗した接続や途中で切れた接続は無視して待ち受けを続ける
+                print(f"接続を拒否しました: {e}")
+                continue
+            
+            with conn:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    continue
+                try:
+                    if request['mode'] == 'full':
+                        result = separate_vocals_full(request['input_path'], request['output_dir'], request['model'])
+                    else:
+                        result = separate_vocals(request['input_path'], request['output_dir'], request['model'])
+                    conn.send({'ok': True, 'result': result})
+                except Exception as e:
+                    try:
+                        conn.send({'ok': False, 'error': str(e)})
+                    except (EOFError, OSError):
+                        pass
+
+
+def separate_with_server(input_path, mode='vocal', output_dir=None, model='htdemucs', address=SERVER_ADDRESS):
+    """
+    常駐サーバー（--serve）に分離を依頼
+    
+    Args:
+        input_path (str): 入力音声ファイルパス
+        mode (str): 'vocal'（ボーカルのみ）または 'full'（4-stem）
+        output_dir (str): 出力ディレクトリ
+        model (str): 分離モデル
+        address (tuple): サーバーのアドレス
+    
+    Returns:
+        str | dict: separate_vocals / separate_vocals_full と同じ戻り値
+    
+    Raises:
+        ConnectionRefusedError: サーバーが起動していない場合
+    """
+    # サーバーとは作業ディレクトリが異なるため絶対パスで渡す
+    request = {
+        'input_path': os.path.abspath(input_path),
+        'mode': mode.lower(),
+        'output_dir': os.path.abspath(output_dir) if output_dir else None,
+        'model': model,
+    }
+    with Client(address, authkey=_get_server_authkey()) as conn:
+        conn.send(request)
+        response = conn.recv()
+    
+    if not response['ok']:
+        raise RuntimeError(response['error'])
+    return response['result']
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        serve(model=sys.argv[2] if len(sys.argv) > 2 else 'htdemucs')
+        sys.exit(0)
+    
     if len(sys.argv) < 2:
         print("=" * 60)
         print("Demucs 音源分離ツール")
         print("=" * 60)
         print("\n使い方:")
         print("  python audio_separation.py <入力ファイル> [モード] [モデル]")
+        print("  python audio_separation.py --serve [モデル]  # モデルを常駐させる")
         print("\nモード:")
         print("  vocal (デフォルト): ボーカルのみ分離（高速・推奨）")
         print("  full: 4-stem完全分離（vocals/drums/bass/other）")
@@ -166,6 +334,7 @@ if __name__ == "__main__":
         print("  python audio_separation.py song.mp3")
         print("  python audio_separation.py song.mp3 full")
         print("  python audio_separation.py song.mp3 vocal htdemucs_ft")
+        print("\n※ --serve で起動したサーバーがあれば、モデルを読み込まずにサーバーで処理します")
         print("=" * 60)
         sys.exit(1)
     
@@ -177,7 +346,12 @@ if __name__ == "__main__":
         print(f"エラー: ファイルが見つかりません: {input_file}")
         sys.exit(1)
     
-    if mode.lower() == 'full':
-        separate_vocals_full(input_file, model=model)
-    else:
-        separate_vocals(input_file, model=model)
+    # 常駐サーバーがあればそちらで処理（モデル読み込みを省略）
+    try:
+        result = separate_with_server(input_file, mode=mode, model=model)
+        print(f"分離サーバーで処理しました: {result}")
+    except ConnectionRefusedError:
+        if mode.lower() == 'full':
+            separate_vocals_full(input_file, model=model)
+        else:
+            separate_vocals(input_file, model=model)
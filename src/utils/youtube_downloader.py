@@ -7,7 +7,6 @@ YouTubeから音声をダウンロードしてWAV形式に変換
 """
 
 import sys
-import subprocess
 import os
 from pathlib import Path
 
@@ -27,6 +26,10 @@ def download_youtube_as_wav(youtube_url, output_path=None):
         os.makedirs(output_dir, exist_ok=True)
         output_path = os.path.join(output_dir, "downloaded.wav")
     
+    # ポストプロセッサが拡張子を.wavに置き換えるため、出力パスもそれに合わせる
+    output_base = os.path.splitext(output_path)[0]
+    output_path = output_base + ".wav"
+    
     print("=" * 60)
     print("YouTube 音声ダウンロード")
     print("=" * 60)
@@ -34,29 +37,37 @@ def download_youtube_as_wav(youtube_url, output_path=None):
     print(f"出力先: {output_path}")
     print("=" * 60 + "\n")
     
-    # 一時ファイル
-    temp_file = "temp_audio.m4a"
+    try:
+        import yt_dlp
+    except ImportError:
+        print("\nエラー: 必要なツールが見つかりません")
+        print("以下をインストールしてください:")
+        print("  pip install yt-dlp")
+        print("  ffmpeg (システムにインストール)")
+        sys.exit(1)
+    
+    # yt-dlpのポストプロセッサでダウンロードとWAV変換を一度に行う
+    # （中間のm4aを別プロセスのffmpegで再変換しない）
+    ydl_opts = {
+        'format': 'bestaudio',
+        'outtmpl': output_base + '.%(ext)s',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'wav',
+            'preferredquality': '0',
+        }],
+        'postprocessor_args': {
+            'extractaudio': [
+                '-ar', '44100',  # サンプリングレート 44.1kHz
+                '-ac', '2',      # ステレオ
+            ],
+        },
+    }
     
     try:
-        # yt-dlpで音声のみダウンロード
-        print("音声をダウンロード中...")
-        cmd1 = ['yt-dlp', '-f', 'bestaudio', '-o', temp_file, youtube_url]
-        subprocess.run(cmd1, check=True)
-        
-        # ffmpegでwav変換
-        print("\nWAV形式に変換中...")
-        cmd2 = [
-            'ffmpeg', '-y', '-i', temp_file,
-            '-ar', '44100',  # サンプリングレート 44.1kHz
-            '-ac', '2',      # ステレオ
-            '-vn',           # 動画なし
-            output_path
-        ]
-        subprocess.run(cmd2, check=True, capture_output=True)
-        
-        # 一時ファイル削除
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
+        print("音声をダウンロード・WAV形式に変換中...")
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.download([youtube_url])
         
         print("\n" + "=" * 60)
         print("✓ ダウンロード完了!")
@@ -69,18 +80,27 @@ def download_youtube_as_wav(youtube_url, output_path=None):
         
         return output_path
         
-    except subprocess.CalledProcessError as e:
+    except yt_dlp.utils.DownloadError as e:
         print(f"\nエラー: {e}")
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-        sys.exit(1)
-    except FileNotFoundError as e:
-        print(f"\nエラー: 必要なツールが見つかりません")
-        print("以下をインストールしてください:")
-        print("  pip install yt-dlp")
-        print("  ffmpeg (システムにインストール)")
+        print("ffmpeg がシステムにインストールされているか確認してください。")
         sys.exit(1)
 
+def get_youtube_title(youtube_url):
+    """
+    YouTube動画のタイトルを取得（音声はダウンロードしない）
+    
+    Args:
+        youtube_url (str): YouTubeのURL
+    
+    Returns:
+        str | None: 動画のタイトル（取得できない場合はNone）
+    """
+    try:
+        import yt_dlp
+        with yt_dlp.YoutubeDL({'quiet': True, 'skip_download': True}) as ydl:
+            return ydl.extract_info(youtube_url, download=False).get('title')
+    except Exception:
+        return None
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
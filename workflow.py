@@ -8,13 +8,38 @@ Fish Audio TTS - 音声クローン作成の完全ワークフロー
 4. TTSで音声を生成
 
 使い方:
-    python workflow.py
+    python workflow.py                        # 対話式
+    python workflow.py --config workflow.json # 設定ファイルで複数ファイルを一括処理
+
+設定ファイル（JSON、PyYAMLがあればYAMLも可）の例:
+    {
+        "sources": ["voice1.wav", "https://www.youtube.com/watch?v=..."],
+        "separate": true,
+        "model": "htdemucs",
+        "title_template": "My Voice Clone ({stem})",
+        "description_template": "Created from {name}"
+    }
 """
 
+import argparse
+import io
+import json
 import os
+import queue
 import sys
+import threading
 from pathlib import Path
 
+# YAML形式の設定ファイル用（オプション）
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+# 一覧表示する音声ファイルの拡張子
+AUDIO_SUFFIXES = (".wav", ".mp3", ".m4a", ".opus", ".flac", ".ogg")
+
 def print_header(text):
     print("\n" + "=" * 70)
     print(f"  {text}")
@@ -31,7 +56,263 @@ def get_choice(prompt, valid_choices):
             return choice
         print(f"無効な入力です。{valid_choices} から選択してください。")
 
-def main():
+def run_pipeline(jobs, api_key, separation_model=None):
+    """
+    音源分離とモデル作成を複数ファイルに対してパイプラインで実行します。
+    
+    次のファイルの音源分離（CPU/GPU処理）を、前のファイルのアップロード（ネットワーク処理）と
+    並行して行うため、全体の処理時間は両者の合計ではなく長い方に近くなります。
+    音源分離は同じプロセス内で行うため、Demucsモデルは最初のファイルで一度だけ読み込まれ、
+    以降のファイルではキャッシュされたモデルを使います。
+    
+    Args:
+        jobs (list[dict]): 処理するファイル（"audio_file", "title", "description" を持つ辞書）
+        api_key (str): Fish AudioのAPIキー
+        separation_model (str): 音源分離モデル（Noneの場合は音源分離しない）
+    
+    Returns:
+        list[tuple[dict, str]]: 各ファイルと作成されたモデルID（失敗した場合はNone）
+    """
+    from src.create_voice_clone import create_voice_clone_model
+    
+    # 分離済みのファイルを1つだけ先行させる（アップロードが詰まったら分離も待つ）
+    separated = queue.Queue(maxsize=1)
+    
+    separated_root = os.path.join(os.path.dirname(__file__), "separated")
+    
+    def separate_worker():
+        try:
+            for i, job in enumerate(jobs):
+                vocal_file = job["audio_file"]
+                if separation_model:
+                    try:
+                        from src.utils.audio_separation import separate_vocals
+                        # 同じファイル名の入力がアップロード中の出力を上書きしないよう、ファイルごとに出力先を分ける
+                        vocal_file = separate_vocals(
+                            job["audio_file"],
+                            output_dir=os.path.join(separated_root, f"job_{i}"),
+                            model=separation_model
+                        )
+                        print(f"✓ ボーカル抽出完了: {vocal_file}")
+                    except (Exception, SystemExit) as e:
+                        # demucs がない場合は sys.exit() されるため、SystemExit も捕捉して報告する
+                        # 伴奏入りの音声でクレジットを消費しないよう、このファイルはスキップ
+                        print(f"エラー（音源分離）: {job['audio_file']}: {e}")
+                        vocal_file = None
+                separated.put((job, vocal_file))
+        finally:
+            separated.put(None)
+    
+    # 音源分離はバックグラウンドで実行し、メインスレッドでアップロードする
+    threading.Thread(target=separate_worker, daemon=True).start()
+    
+    results = []
+    while (item := separated.get()) is not None:
+        job, vocal_file = item
+        if vocal_file is None:
+            results.append((job, None))
+            continue
+        
+        try:
+            model_id = create_voice_clone_model(
+                api_key=api_key,
+                audio_file_path=vocal_file,
+                model_title=job["title"],
+                model_description=job["description"]
+            )
+            results.append((job, model_id))
+        except Exception as e:
+            print(f"エラー（モデル作成）: {job['audio_file']}: {e}")
+            results.append((job, None))
+    
+    return results
+
+def get_api_key():
+    """APIキーを環境変数から取得（未設定の場合は終了）"""
+    api_key = os.getenv("FISH_AUDIO_API_KEY")
+    if not api_key:
+        print("エラー: FISH_AUDIO_API_KEY が設定されていません")
+        print(".envファイルを作成するか、環境変数を設定してください")
+        sys.exit(1)
+    return api_key
+
+def run_multiple(audio_files, model):
+    """複数ファイルの音源分離とモデル作成を行い、最後に作成したモデルIDを返す"""
+    print_step(3, "音声クローンモデルの作成")
+    
+    title_prefix = input("\nモデル名の接頭辞を入力（Enter=デフォルト）: ").strip() or "My Voice Clone"
+    jobs = [
+        {
+            "audio_file": path,
+            "title": f"{title_prefix} ({Path(path).stem})",
+            "description": f"Created from {Path(path).name}"
+        }
+        for path in audio_files
+    ]
+    
+    print(f"\n{len(jobs)}個のファイルを処理します（音源分離: {model or 'なし'}）...")
+    print("※APIクレジットを消費します\n")
+    
+    results = run_pipeline(jobs, get_api_key(), separation_model=model)
+    
+    print("\n作成結果:")
+    for job, created_id in results:
+        status = f"✓ {created_id}" if created_id else "✗ 失敗"
+        print(f"  {job['title']}: {status}")
+    
+    model_ids = [created_id for _, created_id in results if created_id]
+    if not model_ids:
+        print("エラー: モデルを作成できませんでした")
+        sys.exit(1)
+    return model_ids[-1]
+
+def run_single(audio_file, model):
+    """1つのファイルの音源分離とモデル作成を行い、作成したモデルIDを返す"""
+    vocal_file = audio_file
+    
+    if model:
+        print(f"\n音源分離を実行中（モデル: {model}）...")
+        print("※初回実行時はモデルのダウンロードで数分かかります\n")
+        
+        try:
+            from src.utils.audio_separation import separate_vocals
+            vocal_file = separate_vocals(audio_file, model=model)
+            print(f"✓ ボーカル抽出完了: {vocal_file}")
+        except Exception as e:
+            print(f"エラー: {e}")
+            print("demucsがインストールされているか確認してください: pip install demucs")
+            use_original = get_choice("\n元のファイルを使用しますか？ (y/n): ", ['y', 'n'])
+            if use_original != 'y':
+                sys.exit(1)
+            vocal_file = audio_file
+    
+    # ステップ3: 音声クローンモデルの作成
+    print_step(3, "音声クローンモデルの作成")
+    
+    print(f"使用する音声ファイル: {vocal_file}")
+    
+    model_title = input("\nモデル名を入力（Enter=デフォルト）: ").strip() or "My Voice Clone"
+    model_desc = input("モデルの説明（Enter=スキップ）: ").strip() or f"Created from {Path(vocal_file).name}"
+    
+    print("\n音声クローンモデルを作成中...")
+    print("※APIクレジットを消費します\n")
+    
+    # APIキーの確認
+    api_key = get_api_key()
+    
+    try:
+        from src.create_voice_clone import create_voice_clone_model
+        model_id = create_voice_clone_model(
+            api_key=api_key,
+            audio_file_path=vocal_file,
+            model_title=model_title,
+            model_description=model_desc
+        )
+        print(f"\n✓ モデル作成完了!")
+        print(f"モデルID: {model_id}")
+    except Exception as e:
+        print(f"エラー: {e}")
+        sys.exit(1)
+    
+    return model_id
+
+def load_config(config_path):
+    """
+    一括処理の設定ファイルを読み込みます。
+    
+    Args:
+        config_path (str): 設定ファイルのパス（.json / .yaml / .yml）
+    
+    Returns:
+        dict: 設定内容
+    """
+    path = Path(config_path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix.lower() in (".yaml", ".yml"):
+            if not YAML_AVAILABLE:
+                raise ImportError("YAML形式の設定ファイルにはPyYAMLが必要です: pip install pyyaml")
+            config = yaml.safe_load(f)
+        else:
+            config = json.load(f)
+    
+    if not config or not config.get("sources"):
+        raise ValueError(f"設定ファイルに sources がありません: {config_path}")
+    
+    # ダウンロードなどの処理を始める前に、設定の誤りをまとめて検出する
+    sources = config["sources"]
+    if not isinstance(sources, list) or not all(isinstance(source, str) for source in sources):
+        raise ValueError("sources は文字列（ファイルパスまたはURL）のリストで指定してください")
+    for key in ("title_template", "description_template"):
+        template = config.get(key)
+        if template is None:
+            continue
+        if not isinstance(template, str):
+            raise ValueError(f"{key} は文字列で指定してください")
+        try:
+            template.format(stem="", name="")
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"{key} が不正です（使用できるのは {{stem}} と {{name}} のみ）: {template!r}: {e}")
+    return config
+
+def run_batch(config):
+    """設定ファイルの内容に従って、対話なしで複数のモデルを作成"""
+    print_header("🎤 Fish Audio - 音声クローン一括作成")
+    
+    api_key = get_api_key()
+    separation_model = config.get("model", "htdemucs") if config.get("separate", False) else None
+    title_template = config.get("title_template", "{stem}")
+    description_template = config.get("description_template", "Created from {name}")
+    
+    # 音声ソースの準備（URLはYouTubeからダウンロード）
+    jobs = []
+    download_dir = os.path.join(os.path.dirname(__file__), "examples")
+    for i, source in enumerate(config["sources"]):
+        if source.startswith(("http://", "https://")):
+            try:
+                from src.utils.youtube_downloader import download_youtube_as_wav, get_youtube_title
+                # ダウンロード同士で上書きしないよう、ソースごとに別のファイルに保存
+                os.makedirs(download_dir, exist_ok=True)
+                audio_file = download_youtube_as_wav(
+                    source, output_path=os.path.join(download_dir, f"batch_{i}.wav")
+                )
+                print(f"✓ ダウンロード完了: {audio_file}")
+            except (Exception, SystemExit) as e:
+                # download_youtube_as_wav は失敗時に sys.exit() するため、SystemExit も捕捉してスキップ
+                print(f"エラー（ダウンロード）: {source}: {e}")
+                continue
+            # 保存先のファイル名は連番のため、テンプレートには動画のタイトル（取得できなければURL）を使う
+            stem = name = get_youtube_title(source) or source
+        else:
+            audio_file = source
+            if not os.path.exists(audio_file):
+                print(f"エラー: ファイルが見つかりません: {audio_file}")
+                continue
+            stem, name = Path(audio_file).stem, Path(audio_file).name
+        
+        jobs.append({
+            "audio_file": audio_file,
+            "title": title_template.format(stem=stem, name=name),
+            "description": description_template.format(stem=stem, name=name)
+        })
+    
+    if not jobs:
+        print("エラー: 処理できる音声ファイルがありません")
+        sys.exit(1)
+    
+    print(f"{len(jobs)}個のファイルを処理します（音源分離: {separation_model or 'なし'}）...")
+    print("※APIクレジットを消費します\n")
+    
+    results = run_pipeline(jobs, api_key, separation_model=separation_model)
+    
+    print_header("✅ 一括処理完了!")
+    for job, model_id in results:
+        status = f"✓ {model_id}" if model_id else "✗ 失敗"
+        print(f"  {job['title']}: {status}")
+    
+    if not any(model_id for _, model_id in results):
+        sys.exit(1)
+
+def run_interactive():
     print_header("🎤 Fish Audio - 音声クローン作成ワークフロー")
     
     print("このツールは音声クローンモデルの作成を段階的にサポートします。\n")
@@ -44,6 +325,7 @@ def main():
     source_choice = get_choice("\n選択してください (1/2): ", ['1', '2'])
     
     audio_file = None
+    audio_files = []
     
     if source_choice == '2':
         # YouTubeダウンロード
@@ -58,21 +340,32 @@ def main():
                 print(f"エラー: {e}")
                 print("yt-dlpとffmpegがインストールされているか確認してください。")
                 sys.exit(1)
+        audio_files = [audio_file] if audio_file else []
     else:
         # 既存ファイル
         default_path = "examples"
         print(f"\n'{default_path}' フォルダ内のファイル:")
         examples_dir = Path(default_path)
         if examples_dir.exists():
-            audio_files = list(examples_dir.glob("*.wav")) + list(examples_dir.glob("*.mp3"))
-            for i, f in enumerate(audio_files, 1):
+            # ディレクトリを1回だけ走査して音声ファイルを抽出
+            example_files = [
+                Path(entry.path) for entry in os.scandir(examples_dir)
+                if entry.is_file() and entry.name.lower().endswith(AUDIO_SUFFIXES)
+            ]
+            for i, f in enumerate(example_files, 1):
                 print(f"  {i}. {f.name}")
         
-        audio_file = input("\n音声ファイルのパスを入力: ").strip()
+        audio_input = input("\n音声ファイルのパスを入力（複数ある場合はカンマ区切り）: ").strip()
+        audio_files = [path.strip() for path in audio_input.split(",") if path.strip()]
+        audio_file = audio_files[0] if audio_files else None
     
-    if not audio_file or not os.path.exists(audio_file):
+    if not audio_files:
         print(f"エラー: ファイルが見つかりません: {audio_file}")
         sys.exit(1)
+    for path in audio_files:
+        if not os.path.exists(path):
+            print(f"エラー: ファイルが見つかりません: {path}")
+            sys.exit(1)
     
     # ステップ2: 音源分離の確認
     print_step(2, "音源分離（ボーカル抽出）")
@@ -80,7 +373,7 @@ def main():
     
     separate = get_choice("\n音源分離を実行しますか？ (y/n): ", ['y', 'n', 'yes', 'no'])
     
-    vocal_file = audio_file
+    model = None
     
     if separate in ['y', 'yes']:
         print("\n音源分離モデル:")
@@ -96,53 +389,12 @@ def main():
             '3': 'mdx_extra'
         }
         model = models[model_choice]
-        
-        print(f"\n音源分離を実行中（モデル: {model}）...")
-        print("※初回実行時はモデルのダウンロードで数分かかります\n")
-        
-        try:
-            from src.utils.audio_separation import separate_vocals
-            vocal_file = separate_vocals(audio_file, model=model)
-            print(f"✓ ボーカル抽出完了: {vocal_file}")
-        except Exception as e:
-            print(f"エラー: {e}")
-            print("demucsがインストールされているか確認してください: pip install demucs")
-            use_original = get_choice("\n元のファイルを使用しますか？ (y/n): ", ['y', 'n'])
-            if use_original != 'y':
-                sys.exit(1)
-            vocal_file = audio_file
     
-    # ステップ3: 音声クローンモデルの作成
-    print_step(3, "音声クローンモデルの作成")
-    
-    print(f"使用する音声ファイル: {vocal_file}")
-    
-    model_title = input("\nモデル名を入力（Enter=デフォルト）: ").strip() or "My Voice Clone"
-    model_desc = input("モデルの説明（Enter=スキップ）: ").strip() or f"Created from {Path(vocal_file).name}"
-    
-    print("\n音声クローンモデルを作成中...")
-    print("※APIクレジットを消費します\n")
-    
-    # APIキーの確認
-    api_key = os.getenv("FISH_AUDIO_API_KEY")
-    if not api_key:
-        print("エラー: FISH_AUDIO_API_KEY が設定されていません")
-        print(".envファイルを作成するか、環境変数を設定してください")
-        sys.exit(1)
-    
-    try:
-        from src.create_voice_clone import create_voice_clone_model
-        model_id = create_voice_clone_model(
-            api_key=api_key,
-            audio_file_path=vocal_file,
-            model_title=model_title,
-            model_description=model_desc
-        )
-        print(f"\n✓ モデル作成完了!")
-        print(f"モデルID: {model_id}")
-    except Exception as e:
-        print(f"エラー: {e}")
-        sys.exit(1)
+    if len(audio_files) > 1:
+        # 複数ファイル: 音源分離とモデル作成をパイプラインで実行
+        model_id = run_multiple(audio_files, model)
+    else:
+        model_id = run_single(audio_file, model)
     
     # ステップ4: TTS生成
     print_step(4, "TTS音声生成（オプション）")
@@ -155,13 +407,15 @@ def main():
             print("\nTTS生成中...")
             try:
                 from src.generate_tts import generate_tts
+                # 動作確認のみのため、ファイルには保存せずメモリ上で受け取る
                 output = generate_tts(
-                    api_key=api_key,
+                    api_key=get_api_key(),
                     text=text,
                     model_id=model_id,
-                    output_file="test_output.wav"
+                    sink=io.BytesIO()
                 )
-                print(f"\n✓ TTS生成完了: {output}")
+                print(f"\n✓ TTS生成完了: {output.tell():,} bytes")
+                print("  音声を保存する場合: python src/generate_tts.py")
             except Exception as e:
                 print(f"エラー: {e}")
     
@@ -173,6 +427,22 @@ def main():
     print("  - モデルIDは model_id.txt に保存されています")
     print("=" * 70 + "\n")
 
+def main():
+    parser = argparse.ArgumentParser(description="Fish Audio 音声クローン作成ワークフロー")
+    parser.add_argument("--config", help="一括処理の設定ファイル（JSON/YAML）。指定しない場合は対話式で実行")
+    parser.add_argument("--interactive", action="store_true", help="対話式で実行（デフォルト）")
+    args = parser.parse_args()
+    
+    if args.config and not args.interactive:
+        try:
+            config = load_config(args.config)
+        except Exception as e:
+            print(f"エラー: 設定ファイルを読み込めません: {e}")
+            sys.exit(1)
+        run_batch(config)
+    else:
+        run_interactive()
+
 if __name__ == "__main__":
     try:
         main()